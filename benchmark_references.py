@@ -0,0 +1,102 @@
+# Reference formatting benchmark: how long it takes to build the journal abbreviation
+# table and to format a reference list of many papers with it, first with empty caches
+# and then again from the caches.
+#
+#   python benchmark_references.py [--papers 20000] [--journals 100000]
+#
+# The tables next to the scripts are used (see `python journal_abbreviations.py --download`).
+# Without any, a synthetic table of --journals names is generated instead, so the run
+# still reflects a table of that size.
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import pandas as pd
+
+import journal_abbreviations
+import reference_export
+from bibtex_parser import BIBTEX_COLUMNS
+
+WORDS = [
+    'Journal', 'Physical', 'Review', 'Letters', 'Applied', 'Optics', 'Chemical', 'Materials',
+    'Advanced', 'International', 'Research', 'Reports', 'Science', 'Engineering', 'Soft',
+    'Matter', 'Liquid', 'Crystals', 'Molecular', 'Biological', 'Colloid', 'Interface',
+    'Surface', 'Polymer', 'Quantum', 'Photonics', 'Electronics', 'Measurement', 'Fluid',
+    'Mechanics', 'Computational', 'Theoretical', 'Nonlinear', 'Statistical', 'European',
+]
+
+
+def synthetic_table(path, journals, rng):
+    """
+    Write a JabRef-style table of `journals` made-up names and return the names.
+    """
+    names = set()
+    while len(names) < journals:
+        names.add(' '.join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) + f" {rng.randint(1, 999)}")
+    names = sorted(names)
+    with open(path, 'w', encoding='utf-8') as file:
+        for name in names:
+            file.write(f"{name};{name[:12]}.\n")
+    return names
+
+
+def papers(names, count, rng):
+    """
+    BibTeX columns of `count` papers; one in ten journals is in no table.
+    """
+    rows = []
+    for i in range(count):
+        journal = rng.choice(names) if rng.random() < 0.9 else f"Unlisted Journal of Physics {i}"
+        rows.append({
+            'Title': f"Paper number {i}", 'Author': f"Doe, Jane and Smith, John{i % 50}",
+            'Year': str(1990 + i % 35), 'DOI': f"10.1000/{i}", 'Journal': journal,
+            'Volume': str(i % 120), 'Pages': f"{i}--{i + 9}", 'Number': str(i % 12), 'Publisher': '',
+        })
+    df = pd.DataFrame(rows, columns=BIBTEX_COLUMNS)
+    df['BibTeX'] = ''
+    return df
+
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return time.perf_counter() - started, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure building the abbreviation table and formatting references.")
+    parser.add_argument('--papers', type=int, default=20000)
+    parser.add_argument('--journals', type=int, default=100000, help="Size of the synthetic table (no tables found)")
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = journal_abbreviations.table_paths()
+        if paths:
+            names = [name for path in paths for name in journal_abbreviations.load_abbreviation_table(path)]
+            source = f"{len(paths)} table(s) next to the scripts"
+        else:
+            paths = [os.path.join(directory, 'journal_abbreviations_synthetic.csv')]
+            names = synthetic_table(paths[0], args.journals, rng)
+            source = "a synthetic table"
+
+        build_seconds, abbreviator = timed(lambda: journal_abbreviations.build_abbreviator(paths))
+        journal_abbreviations.reset_abbreviator(abbreviator)
+    print(f"Abbreviation table: {len(abbreviator.exact)} journals from {source}, built in {build_seconds:.3f} s")
+
+    df = papers(names, args.papers, rng)
+    print(f"Formatting {len(df)} references:")
+    for style in ('lc', 'aps'):
+        reference_export._format_reference.cache_clear()
+        journal_abbreviations.abbreviate_journal.cache_clear()
+        parts = []
+        cold, _ = timed(lambda: reference_export.export_references(df, style, parts.append))
+        parts = []
+        warm, _ = timed(lambda: reference_export.export_references(df, style, parts.append))
+        print(f"  {style:<4} empty caches {cold:7.3f} s ({len(df) / cold:9.0f}/s)   cached {warm:7.3f} s ({len(df) / warm:9.0f}/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+# Startup benchmark: how long a fresh interpreter takes to put the window on screen,
+# to build the application in it, and to finish loading the default directory's
+# database (see default_directory.txt). Each run is a new process, so imports are
+# measured as the user sees them.
+#
+#   python benchmark_startup.py [--runs 5]
+#
+# Without a display, the window stages are skipped and the import of the application
+# module and a headless load of the database (engine.Library) are timed instead.
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+STAGES = [
+    ('import_tk', "import tkinter"),
+    ('first_window', "window on screen"),
+    ('import_app', "import pdf_search_app"),
+    ('app_ready', "application built"),
+    ('database_loaded', "database loaded"),
+]
+
+
+def measure():
+    """
+    One run, in this process. Returns {stage: seconds since the interpreter started}.
+    """
+    start = time.perf_counter()
+    times = {}
+
+    def mark(stage):
+        times[stage] = time.perf_counter() - start
+
+    import main
+    mark('import_tk')
+    try:
+        root = main.create_window()
+    except main.tk.TclError:
+        root = None
+    else:
+        mark('first_window')
+
+    import pdf_search_app  # noqa: F401
+    mark('import_app')
+
+    if root is None:
+        from engine import Library
+        from utils import load_default_directory
+        directory = load_default_directory()
+        if directory and os.path.isdir(directory):
+            Library(directory)
+        mark('database_loaded')
+        return times
+
+    app = main.create_app(root)
+    mark('app_ready')
+    while app.library_loading:
+        root.update()
+        time.sleep(0.005)
+    mark('database_loaded')
+    # Not app.on_close(): a benchmark run must not write to the database
+    root.destroy()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the startup time of the application.")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure()))
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        started = time.perf_counter()
+        output = subprocess.run(
+            [sys.executable, __file__, '--child'], capture_output=True, text=True, check=True
+        ).stdout
+        times = json.loads(output.strip().splitlines()[-1])
+        times['process'] = time.perf_counter() - started
+        runs.append(times)
+
+    print(f"Startup time over {len(runs)} runs (median seconds; the stages are counted from the start of the script):")
+    for stage, label in STAGES + [('process', "whole process")]:
+        values = [times[stage] for times in runs if stage in times]
+        if values:
+            print(f"  {label:<24} {statistics.median(values):7.3f}")
+    if not any('first_window' in times for times in runs):
+        print("No display: window stages skipped, database loaded without the window.")
+
+
+if __name__ == "__main__":
+    main()
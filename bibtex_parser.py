@@ -0,0 +1,128 @@
+import re
+
+# Database columns materialized from the BibTeX entry, and the field each one holds
+BIBTEX_COLUMN_FIELDS = {
+    'Title': 'title',
+    'Author': 'author',
+    'Year': 'year',
+    'DOI': 'doi',
+    'Journal': 'journal',
+    'Volume': 'volume',
+    'Pages': 'pages',
+    'Number': 'number',
+    'Publisher': 'publisher',
+}
+BIBTEX_COLUMNS = list(BIBTEX_COLUMN_FIELDS)
+
+_ENTRY_HEADER = re.compile(r'\s*@\s*\w+\s*[{(]\s*[^,\s]*\s*,?')
+_FIELD_NAME = re.compile(r'\s*([A-Za-z][\w\-:.+]*)\s*=\s*')
+
+
+def _braced_value(text, pos):
+    """
+    Value in braces starting at text[pos] == '{'. Returns (value, position after it);
+    nested braces are kept, so '{The {DNA} story}' gives 'The {DNA} story'.
+    """
+    depth = 0
+    for end in range(pos, len(text)):
+        char = text[end]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return text[pos + 1:end], end + 1
+    return text[pos + 1:], len(text)
+
+
+def _quoted_value(text, pos):
+    """
+    Value in double quotes starting at text[pos] == '"'. Quotes inside braces do not end it.
+    """
+    depth = 0
+    for end in range(pos + 1, len(text)):
+        char = text[end]
+        if char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+        elif char == '"' and depth <= 0 and text[end - 1] != '\\':
+            return text[pos + 1:end], end + 1
+    return text[pos + 1:], len(text)
+
+
+def _bare_value(text, pos):
+    """
+    Unquoted value (a number or a macro name), which runs until the next ',', '}' or '#'.
+    """
+    end = pos
+    while end < len(text) and text[end] not in ',}#\n':
+        end += 1
+    return text[pos:end].strip(), end
+
+
+def parse_bibtex(bibtex_str):
+    """
+    Parse a BibTeX entry into {field name (lowercase): value} in a single pass.
+
+    Values may be braced (with nested braces), quoted, bare or joined with '#'.
+    Line breaks in values become spaces and values are stripped, as parse_bibtex_field
+    always did. A field that appears twice keeps its first value. Text that is not a
+    field (a broken line in a hand-edited entry) is skipped up to the next comma.
+    """
+    fields = {}
+    if not isinstance(bibtex_str, str):
+        return fields
+
+    text = bibtex_str
+    header = _ENTRY_HEADER.match(text)
+    pos = header.end() if header else 0
+
+    while pos < len(text):
+        match = _FIELD_NAME.match(text, pos)
+        if not match:
+            next_comma = text.find(',', pos)
+            if next_comma == -1:
+                break
+            pos = next_comma + 1
+            continue
+
+        name = match.group(1).lower()
+        pos = match.end()
+        parts = []
+        while pos < len(text):
+            char = text[pos]
+            if char == '{':
+                value, pos = _braced_value(text, pos)
+            elif char == '"':
+                value, pos = _quoted_value(text, pos)
+            else:
+                value, pos = _bare_value(text, pos)
+            parts.append(value)
+            # String concatenation: "a" # {b}
+            while pos < len(text) and text[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(text) and text[pos] == '#':
+                pos += 1
+                while pos < len(text) and text[pos] in ' \t\r\n':
+                    pos += 1
+                continue
+            break
+
+        if name not in fields:
+            fields[name] = ''.join(parts).replace('\r', '').replace('\n', ' ').strip()
+
+        next_comma = text.find(',', pos)
+        if next_comma == -1:
+            break
+        pos = next_comma + 1
+
+    return fields
+
+
+def bibtex_metadata(bibtex_str):
+    """
+    The values of BIBTEX_COLUMNS for one BibTeX entry ('' for missing fields).
+    """
+    fields = parse_bibtex(bibtex_str)
+    return [fields.get(field, '') for field in BIBTEX_COLUMN_FIELDS.values()]
@@ -0,0 +1,172 @@
+# Command-line interface: the scan, search, duplicate, DOI and export pipelines
+# without a window (tkinter is never imported). Every command prints one JSON object.
+#
+#   python cli.py scan
+#   python cli.py search "{optics} author:smith liquid crystal"
+#   python cli.py dedupe
+#   python cli.py extract-doi
+#   python cli.py export "year:2020.." --style aps --output refs.txt
+#
+# -d/--directory defaults to the directory in default_directory.txt.
+import argparse
+import contextlib
+import json
+import os
+import sys
+
+from engine import Library
+from reference_export import REFERENCE_STYLES, export_references
+from search_query import parse_query, sort_results
+from utils import load_default_directory
+
+# Columns reported for each paper
+RESULT_COLUMNS = ['Path', 'Name', 'Title', 'Author', 'Year', 'Journal', 'DOI', 'Comments']
+
+
+def _records(rows, columns=RESULT_COLUMNS):
+    rows = rows[[column for column in columns if column in rows.columns]]
+    return rows.astype(object).where(rows.notna(), None).to_dict(orient='records')
+
+
+@contextlib.contextmanager
+def _stdout_to_stderr():
+    """
+    Send everything printed while running a command to stderr, including the output
+    of the DOI worker processes, so stdout only carries the JSON result.
+    """
+    sys.stdout.flush()
+    saved = os.dup(1)
+    os.dup2(2, 1)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+
+
+def _search(library, text, threshold, fulltext=False):
+    query = parse_query(text or '')
+    if query.is_empty():
+        return sort_results(library.df)
+    return sort_results(library.search(query, threshold, fulltext=fulltext))
+
+
+def scan(library, args):
+    diff, duplicates, messages = library.scan()
+    return {
+        'directory': library.directory,
+        'papers': len(library.df),
+        'new': diff.new['Path'].tolist(),
+        'modified': diff.modified['Path'].tolist(),
+        'moved': diff.renamed,
+        'missing': list(diff.missing),
+        'duplicate_groups': len(duplicates),
+        'pending_doi': len(library.pending_doi_paths()),
+        'messages': messages,
+    }
+
+
+def search(library, args):
+    results = _search(library, args.query, args.threshold, args.fulltext)
+    return {
+        'query': args.query,
+        'count': len(results),
+        'results': _records(results.head(args.limit) if args.limit else results),
+    }
+
+
+def dedupe(library, args):
+    # Only reports: deleting a copy is left to the user (or the window's confirmation dialog)
+    groups = library.find_duplicates()
+    return {
+        'count': len(groups),
+        'groups': [_records(group, ['Path', 'Name', 'Size', 'DOI']) for group in groups],
+    }
+
+
+def extract_doi(library, args):
+    not_found = []
+
+    def progress(path, bib_info, error):
+        if bib_info == '':
+            not_found.append(path)
+        print(f"{'ok' if bib_info else 'failed'}: {path}")
+
+    extracted, failures = library.extract_dois(args.paths or None, progress=progress)
+    return {
+        'extracted': [path for path in extracted if path not in not_found],
+        'not_found': not_found,
+        'failures': [{'path': path, 'error': error} for path, error in failures],
+    }
+
+
+def export(library, args):
+    results = _search(library, args.query, args.threshold)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as file:
+            exported, skipped = export_references(results, args.style, file.write)
+        return {'exported': exported, 'skipped': skipped, 'output': args.output}
+    parts = []
+    exported, skipped = export_references(results, args.style, parts.append)
+    return {'exported': exported, 'skipped': skipped, 'references': ''.join(parts)}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Search and maintain a PDF library without the window.")
+    parser.add_argument('-d', '--directory', help="Library directory (default: default_directory.txt)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('scan', help="Reconcile the database with the files on disk").set_defaults(run=scan)
+
+    search_parser = commands.add_parser('search', help="Search with the query language of the search box")
+    search_parser.add_argument('query')
+    search_parser.add_argument('-t', '--threshold', type=int, default=100, help="Fuzzy match threshold (default: 100)")
+    search_parser.add_argument('--fulltext', action='store_true', help="Search the text of the PDFs")
+    search_parser.add_argument('--limit', type=int, default=0, help="Report at most this many results")
+    search_parser.set_defaults(run=search)
+
+    commands.add_parser('dedupe', help="Report groups of duplicate files").set_defaults(run=dedupe)
+
+    extract_parser = commands.add_parser('extract-doi', help="Extract DOIs and BibTeX for PDFs without BibTeX")
+    extract_parser.add_argument('paths', nargs='*', help="Only these files (default: every PDF not extracted yet)")
+    extract_parser.set_defaults(run=extract_doi)
+
+    export_parser = commands.add_parser('export', help="Export the references of a search (default: all papers)")
+    export_parser.add_argument('query', nargs='?', default='')
+    export_parser.add_argument('-s', '--style', choices=sorted(REFERENCE_STYLES), default='lc')
+    export_parser.add_argument('-t', '--threshold', type=int, default=100)
+    export_parser.add_argument('-o', '--output', help="Write the references to this file")
+    export_parser.set_defaults(run=export)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    directory = args.directory or load_default_directory()
+    if not directory:
+        print(json.dumps({'error': "No directory given and no default_directory.txt found."}))
+        return 2
+    if not os.path.isdir(directory):
+        print(json.dumps({'error': f"The directory '{directory}' does not exist."}))
+        return 2
+
+    # Progress and warnings from the pipelines go to stderr, so stdout is only JSON
+    with _stdout_to_stderr():
+        library = Library()
+        try:
+            library.open(directory)
+            output = args.run(library, args)
+            status = 0
+        except (RuntimeError, ValueError, OSError) as e:
+            output = {'error': str(e)}
+            status = 1
+        finally:
+            library.close()
+    print(json.dumps(output, ensure_ascii=False, indent=2, default=str))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
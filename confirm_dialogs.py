@@ -1,34 +1,89 @@
 import tkinter as tk
-from tkinter import Toplevel, Label, Frame, Button
+from tkinter import Toplevel, Label, Frame, Button, Listbox, Scrollbar, Radiobutton
 
-def confirm_extraction(name):
-    confirmed = []
+def confirm_batch_extraction(names):
+    """
+    Ask once which of the new files should have their DOI extracted.
+    Returns the indices of the selected names.
+    """
+    selected = []
 
-    def on_yes():
-        confirmed.append(True)
+    def on_extract_selected():
+        selected.extend(listbox.curselection())
         confirmation_window.destroy()
 
-    def on_no():
-        confirmed.append(False)
+    def on_extract_all():
+        selected.extend(range(len(names)))
         confirmation_window.destroy()
 
     confirmation_window = Toplevel()
     confirmation_window.title("Confirm Extraction")
-    confirmation_window.geometry("400x200")
+    confirmation_window.geometry("700x450")
+
+    Label(
+        confirmation_window,
+        text=f"{len(names)} new PDF(s) found. Select the files to extract DOIs for:",
+        wraplength=680, justify="left"
+    ).pack(pady=10, padx=10, anchor="w")
 
     frame = Frame(confirmation_window)
-    frame.pack(pady=10, padx=10, fill="both", expand=True)
+    frame.pack(padx=10, fill="both", expand=True)
 
-    name_label = Label(frame, text=f"Do you want to extract DOI for '{name}'?", wraplength=380, justify="left")
-    name_label.pack(pady=10)
+    scrollbar = Scrollbar(frame, orient="vertical")
+    listbox = Listbox(frame, selectmode=tk.MULTIPLE, yscrollcommand=scrollbar.set)
+    scrollbar.config(command=listbox.yview)
+    for name in names:
+        listbox.insert(tk.END, name)
+    listbox.select_set(0, tk.END)
+    listbox.pack(side="left", fill="both", expand=True)
+    scrollbar.pack(side="right", fill="y")
 
     button_frame = Frame(confirmation_window)
-    button_frame.pack(pady=20)
+    button_frame.pack(pady=15)
 
-    Button(button_frame, text="Yes", command=on_yes, width=10).pack(side="left", padx=20)
-    Button(button_frame, text="No", command=on_no, width=10).pack(side="right", padx=20)
+    Button(button_frame, text="Extract Selected", command=on_extract_selected, width=15).pack(side="left", padx=10)
+    Button(button_frame, text="Extract All", command=on_extract_all, width=15).pack(side="left", padx=10)
+    Button(button_frame, text="Skip", command=confirmation_window.destroy, width=15).pack(side="left", padx=10)
 
     confirmation_window.grab_set()
     confirmation_window.wait_window()
 
-    return confirmed[0]
+    return selected
+
+def show_duplicates_dialog(root, duplicates, font):
+    selected_file =[]
+
+    def on_confirm():
+        if selected_var.get():
+            selected_file.append(selected_var.get())
+        dialog_window.destroy()
+
+    dialog_window = Toplevel(root)
+    dialog_window.title("Select File to Delete")
+    dialog_window.geometry("1150x200")
+
+    frame = Frame(dialog_window)
+    frame.pack(fill="both", expand=True, padx=10, pady=10)
+
+    Label(frame, text="Select the file you want to DELETE:", font=font).pack(anchor="w", pady=(0, 10))
+
+    selected_var = tk.StringVar(value="")
+
+    for _, row in duplicates.iterrows():
+        Radiobutton(
+            frame,
+            text=f"Path: {row['Path']}",
+            variable=selected_var,
+            value=row['Path'],
+            anchor="w",
+            justify="left"
+        ).pack(anchor="w")
+
+    Button(
+        dialog_window, text="Confirm", command=on_confirm, font=font, width=10
+    ).pack(pady=10)
+
+    dialog_window.grab_set()
+    dialog_window.wait_window()
+
+    return selected_file
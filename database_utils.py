@@ -1,152 +1,394 @@
 import os
 import time
+import queue
+import threading
+import numpy as np
 import pandas as pd
-import re
-from datetime import datetime
-from utils import load_database, parse_bibtex_field
+from bibtex_parser import BIBTEX_COLUMNS
+from utils import load_settings
+from directory_cache import DirectoryCache, directory_cache_path_for
+from file_hashing import HashCache, find_identical_files, hash_cache_path, quick_fingerprint
 
-def scan_directory_fast(directory, existing_files_info, missing_files_name_to_info):
+def _fingerprint(file_path, size):
+    try:
+        return quick_fingerprint(file_path, size)
+    except OSError:
+        return None
+
+def build_move_candidates(missing_files_info):
+    """
+    Group the database rows of missing files by size, the first thing a moved file must match.
+    """
+    fingerprints = missing_files_info['Fingerprint'] if 'Fingerprint' in missing_files_info.columns else [None] * len(missing_files_info)
+    mtimes = missing_files_info['Mtime'] if 'Mtime' in missing_files_info.columns else [None] * len(missing_files_info)
+    candidates = {}
+    for path, name, size, modified_date, mtime, fingerprint in zip(
+        missing_files_info['Path'], missing_files_info['Name'], missing_files_info['Size'],
+        missing_files_info['Modified Date'], mtimes, fingerprints
+    ):
+        if pd.isna(size):
+            continue
+        candidates.setdefault(int(size), []).append({
+            'old_path': path, 'name': name, 'modified_date': modified_date,
+            'mtime': None if pd.isna(mtime) else int(mtime),
+            'fingerprint': fingerprint if isinstance(fingerprint, str) and fingerprint else None
+        })
+    return candidates
+
+def match_moved_file(move_candidates, file_path, file_name, size, mtime):
+    """
+    Find the missing file that `file_path` (with integer mtime in nanoseconds) is a move or rename of.
+    Returns (candidate or None, fingerprint of file_path or None if it was not needed).
+    """
+    same_size = move_candidates.get(size)
+    if not same_size:
+        return None, None
+
+    fingerprint = _fingerprint(file_path, size)
+    matches = [c for c in same_size if fingerprint and c['fingerprint'] == fingerprint]
+    if not matches:
+        # Rows saved before fingerprints were stored: same size and modification time (or name)
+        modified_date = time.ctime(mtime // 10**9)
+        matches = [
+            c for c in same_size
+            if c['fingerprint'] is None and (
+                (c['mtime'] == mtime if c['mtime'] is not None else c['modified_date'] == modified_date)
+                or c['name'] == file_name
+            )
+        ]
+    if not matches:
+        return None, fingerprint
+
+    # The file name only breaks ties between files with identical contents
+    match = next((c for c in matches if c['name'] == file_name), matches[0])
+    same_size.remove(match)
+    return match, fingerprint
+
+SCAN_EXTENSIONS = ['.pdf', '.djvu']
+
+def _list_directory(dir_path):
+    """
+    One directory level in scandir order: subdirectories as paths, and PDF/DjVu files
+    as (path, name, ext, size, mtime_ns) tuples. None if the directory can't be read.
+    """
+    items = []
+    try:
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    items.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    ext = os.path.splitext(entry.name)[1].lower()
+                    if ext in SCAN_EXTENSIONS:
+                        # entry.stat() is cached, making this incredibly fast
+                        stat = entry.stat()
+                        items.append((entry.path, entry.name, ext, stat.st_size, stat.st_mtime_ns))
+    except OSError:
+        # Unreadable or unavailable (e.g. a network share that dropped): skipped, and
+        # the files recorded under it are not treated as missing
+        return None
+    return items
+
+def _list_tree_parallel(directory, workers, list_directory=_list_directory):
+    """
+    List every directory under `directory` with a pool of threads fed from a work queue.
+    On network shares most of the time goes to per-directory round trips, which overlap here.
+    """
+    listings = {}
+    errors = []
+    work = queue.Queue()
+
+    def worker():
+        while True:
+            dir_path = work.get()
+            try:
+                if dir_path is None:
+                    return
+                items = list_directory(dir_path)
+                listings[dir_path] = items
+                for item in items or ():
+                    if isinstance(item, str):
+                        work.put(item)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                work.task_done()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    work.put(directory)
+    work.join()
+    for _ in threads:
+        work.put(None)
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
+    return listings
+
+def walk_directory(directory, workers=1, cache=None, walked=None):
+    """
+    Yield the PDF/DjVu files under `directory` as (path, name, ext, size, mtime_ns), depth first.
+    Directories that were listed successfully are added to the set `walked`, if given.
+
+    With workers > 1 the directories are listed in parallel first; the files are still
+    yielded in exactly the order of the single-threaded walk. With a DirectoryCache,
+    directories that did not change since the last scan are not listed again.
+    """
+    list_directory = cache.wrap(_list_directory) if cache is not None else _list_directory
+    if workers > 1:
+        list_directory = _list_tree_parallel(directory, workers, list_directory).__getitem__
+
+    def listing(dir_path):
+        items = list_directory(dir_path)
+        if items is None:
+            return iter(())
+        if walked is not None:
+            walked.add(dir_path)
+        return iter(items)
+
+    stack = [listing(directory)]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+        elif isinstance(item, str):
+            stack.append(listing(item))
+        else:
+            yield item
+
+class LibraryDiff:
+    """
+    Differences between the database and the files on disk, as computed by reconcile().
+
+    new:       rows to add, in the database schema
+    modified:  Path, Size, Modified Date, Mtime, Fingerprint of files whose size or mtime changed
+    moved:     OldPath plus the new Path, Name, Size, Modified Date, Mtime, Fingerprint
+    missing:   paths of files that are gone and were not moved; only rows in directories
+               that were walked can be missing
+    refreshed: Path, Mtime, Fingerprint of unchanged rows saved before those columns existed
+    files_requiring_confirmation: (path, name, ext, size, modified date) of the new PDFs
+    """
+
+    def __init__(self, new, modified, moved, missing, refreshed, files_requiring_confirmation):
+        self.new = new
+        self.modified = modified
+        self.moved = moved
+        self.missing = missing
+        self.refreshed = refreshed
+        self.files_requiring_confirmation = files_requiring_confirmation
+
+    @property
+    def renamed(self):
+        return dict(zip(self.moved['OldPath'], self.moved['Path']))
+
+    @property
+    def changed_paths(self):
+        return self.new['Path'].tolist() + self.modified['Path'].tolist() + self.moved['Path'].tolist()
+
+    @property
+    def added_paths(self):
+        """
+        Paths that were not in the database before: new files and move destinations.
+        """
+        return set(self.new['Path']) | set(self.moved['Path'])
+
+    def is_empty(self):
+        return not (len(self.new) or len(self.modified) or len(self.moved) or len(self.missing) or len(self.refreshed))
+
+    def messages(self):
+        messages = [
+            f"Database has been updated with {len(self.moved)} moved file(s).",
+            f"Database has been updated with {len(self.new)} new file(s).",
+            f"Database has been updated with {len(self.modified)} modified file(s).",
+        ]
+        if self.missing:
+            messages.append(f"Removing {len(self.missing)} missing file(s) from the database.")
+        else:
+            messages.append("No missing files were removed.")
+        return messages
+
+    def apply(self, df):
+        """
+        Return `df` with the differences applied.
+        """
+        # --- OPTIMIZATION: Vectorized Updates (No more slow loops!) ---
+        if len(self.moved):
+            moved = self.moved.set_index('OldPath')
+            mask = df['Path'].isin(moved.index)
+            old_paths = df.loc[mask, 'Path']
+            for column in ['Size', 'Modified Date', 'Mtime', 'Name', 'Fingerprint', 'Path']:
+                df.loc[mask, column] = old_paths.map(moved[column])
+
+        if len(self.new):
+            # The diff may be applied to a newer frame than it was computed on, which can
+            # already have the file (e.g. moved there in the meantime)
+            present = set(df['Path'].tolist())
+            new = self.new[np.fromiter(
+                (path not in present for path in self.new['Path'].tolist()), dtype=bool, count=len(self.new)
+            )]
+            df = pd.concat([df, new], ignore_index=True)
+
+        if len(self.modified) or len(self.refreshed):
+            # Instant bulk update using index alignment
+            updates = pd.concat([self.modified, self.refreshed], ignore_index=True).set_index('Path')
+            df.set_index('Path', inplace=True)
+            df.update(updates)
+            df.reset_index(inplace=True)
+
+        if self.missing:
+            df = df[~df['Path'].isin(self.missing)]
+        return df
+
+
+def reconcile(df, files, walked=None):
     """
-    Scans the directory using os.scandir (which is 5-10x faster than os.walk + threads 
-    because it caches file stats at the OS level).
+    Compare the database with the files found by walk_directory and return a LibraryDiff.
+    With `walked` (the directories walk_directory listed), rows in any other directory
+    (unreadable, unavailable, or outside the scanned tree) are left alone instead of
+    being reported missing.
+
+    New, known and missing files are separated with set operations on the paths; known
+    files are compared with the database in one merge, on size and integer mtime.
+    Only files that share a size with a missing file are checked for moves.
     """
-    new_data = []
-    updated_data =[]
+    scanned = pd.DataFrame(files, columns=['Path', 'Name', 'ext', 'Size', 'Mtime'])
+    scanned['Mtime'] = scanned['Mtime'].astype('Int64')
+    # Plain set lookups: Series.isin is slow on Arrow-backed string columns
+    database_paths = set(df['Path'].tolist())
+    scanned_paths = set(scanned['Path'].tolist())
+    in_database = np.fromiter((path in database_paths for path in scanned['Path'].tolist()), dtype=bool, count=len(scanned))
+    on_disk = np.fromiter((path in scanned_paths for path in df['Path'].tolist()), dtype=bool, count=len(df))
+
+    # --- Known files: modified if size or mtime changed ---
+    stored = df[['Path', 'Size', 'Modified Date', 'Mtime', 'Fingerprint']].rename(
+        columns=lambda column: column if column == 'Path' else column + '_db'
+    )
+    known = scanned[in_database].merge(stored, on='Path', how='left')
+    has_mtime = known['Mtime_db'].notna()
+    changed = (known['Size'] != known['Size_db']) | known['Mtime'].ne(known['Mtime_db']).fillna(False).astype(bool)
+    # Rows saved before Mtime was stored still compare the modification date text
+    legacy = known[~has_mtime]
+    changed[~has_mtime] |= legacy['Modified Date_db'] != [time.ctime(mtime // 10**9) for mtime in legacy['Mtime']]
+
+    modified = known[changed]
+    modified = pd.DataFrame({
+        'Path': modified['Path'], 'Size': modified['Size'],
+        'Modified Date': [time.ctime(mtime // 10**9) for mtime in modified['Mtime']],
+        'Mtime': modified['Mtime'],
+        'Fingerprint': [_fingerprint(path, size) for path, size in zip(modified['Path'], modified['Size'])],
+    })
+
+    # Fill in Mtime and Fingerprint for unchanged rows saved before they existed, so later moves are detected
+    refreshed = known[~changed & (~has_mtime | known['Fingerprint_db'].isna())]
+    refreshed = pd.DataFrame({
+        'Path': refreshed['Path'], 'Mtime': refreshed['Mtime'],
+        'Fingerprint': [
+            fingerprint if isinstance(fingerprint, str) and fingerprint else _fingerprint(path, size)
+            for path, size, fingerprint in zip(refreshed['Path'], refreshed['Size'], refreshed['Fingerprint_db'])
+        ],
+    })
+
+    # --- Unknown files: moved (matched to a missing row) or new ---
+    missing_rows = df[~on_disk]
+    if walked is not None:
+        walked = {os.path.normpath(dir_path) for dir_path in walked}
+        missing_rows = missing_rows[np.fromiter(
+            (os.path.normpath(os.path.dirname(path)) in walked for path in missing_rows['Path'].tolist()),
+            dtype=bool, count=len(missing_rows)
+        )]
+    move_candidates = build_move_candidates(missing_rows)
+    unknown = scanned[~in_database]
     moved_data = []
-    files_requiring_confirmation =[]
-
-    def _scan(dir_path):
-        try:
-            with os.scandir(dir_path) as it:
-                for entry in it:
-                    if entry.is_dir(follow_symlinks=False):
-                        _scan(entry.path)
-                    elif entry.is_file(follow_symlinks=False):
-                        ext = os.path.splitext(entry.name)[1].lower()
-                        if ext in ['.pdf', '.djvu']:
-                            # entry.stat() is cached, making this incredibly fast
-                            stat = entry.stat()
-                            size = stat.st_size
-                            modified_date = time.ctime(stat.st_mtime)
-                            full_path = entry.path
-                            file_name = entry.name
-
-                            if full_path not in existing_files_info:
-                                if file_name in missing_files_name_to_info:
-                                    # File has been moved
-                                    old_path = missing_files_name_to_info[file_name]['old_path']
-                                    moved_data.append({
-                                        'OldPath': old_path, 'Path': full_path, 
-                                        'Size': size, 'Modified Date': modified_date
-                                    })
-                                else:
-                                    # New file
-                                    bibtex_info = '' if ext == '.djvu' else None
-                                    if ext == '.pdf':
-                                        files_requiring_confirmation.append((full_path, file_name, ext, size, modified_date))
-                                    
-                                    date_added = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                    
-                                    # OPTIMIZATION: Align exactly with the new schema!
-                                    new_data.append({
-                                        'Path': full_path, 'Name': file_name, 'Size': size,
-                                        'Modified Date': modified_date, 'BibTeX': bibtex_info,
-                                        'Comments': '', 'Last Used Time': None, 'Date Added': date_added,
-                                        'Title': pd.NA, 'Author': pd.NA, 'Year': pd.NA
-                                    })
-                            else:
-                                # Check if updated
-                                if size != existing_files_info[full_path]['size'] or modified_date != existing_files_info[full_path]['modified_date']:
-                                    updated_data.append({
-                                        'Path': full_path, 'Size': size, 'Modified Date': modified_date
-                                    })
-        except PermissionError:
-            pass # Skip folders we don't have permission to read
-
-    _scan(directory)
-    return new_data, updated_data, moved_data, files_requiring_confirmation
-
-
-def check_database_validity(directory, csv_file):
-    if not os.path.exists(directory):
-        return None, None, None, None, f"The directory '{directory}' does not exist."
+    new_mask = []
+    new_fingerprints = []
+    for path, name, size, mtime in zip(unknown['Path'], unknown['Name'], unknown['Size'], unknown['Mtime']):
+        moved_from, fingerprint = match_moved_file(move_candidates, path, name, size, mtime)
+        if moved_from is not None:
+            moved_data.append({
+                'OldPath': moved_from['old_path'], 'Path': path, 'Name': name, 'Size': size,
+                'Modified Date': time.ctime(mtime // 10**9), 'Mtime': mtime, 'Fingerprint': fingerprint
+            })
+        else:
+            new_fingerprints.append(fingerprint or _fingerprint(path, size))
+        new_mask.append(moved_from is None)
 
-    df = load_database(csv_file)
-    
-    existing_files_info = {
-        row['Path']: {'size': row['Size'], 'modified_date': row['Modified Date']}
-        for _, row in df.iterrows()
-    }
-    
-    missing_files =[file_path for file_path in existing_files_info if not os.path.exists(file_path)]
-    missing_files_info = df[df['Path'].isin(missing_files)].copy()
-    missing_files_name_to_info = {row['Name']: {'old_path': row['Path']} for _, row in missing_files_info.iterrows()}
+    new_files = unknown[new_mask] if len(unknown) else unknown
+    modified_dates = [time.ctime(mtime // 10**9) for mtime in new_files['Mtime']]
+    date_added = pd.Timestamp.now().floor('s')
+    # OPTIMIZATION: Align exactly with the new schema!
+    new = pd.DataFrame({
+        'Path': new_files['Path'], 'Name': new_files['Name'], 'Size': new_files['Size'],
+        'Modified Date': modified_dates,
+        'BibTeX': ['' if ext == '.djvu' else None for ext in new_files['ext']],
+        'Comments': '', 'Last Used Time': pd.NaT, 'Date Added': date_added,
+        # A DjVu entry has no BibTeX to parse, so its columns are already final
+        **{col: ['' if ext == '.djvu' else pd.NA for ext in new_files['ext']] for col in BIBTEX_COLUMNS},
+        'Fingerprint': new_fingerprints, 'Mtime': new_files['Mtime'],
+    })
+    files_requiring_confirmation = [
+        (path, name, ext, size, modified_date)
+        for path, name, ext, size, modified_date in zip(
+            new_files['Path'], new_files['Name'], new_files['ext'], new_files['Size'], modified_dates
+        )
+        if ext == '.pdf'
+    ]
 
-    # Run the lightning-fast scanner
-    new_data, updated_data, moved_data, files_requiring_confirmation = scan_directory_fast(
-        directory, existing_files_info, missing_files_name_to_info
+    moved = pd.DataFrame(
+        moved_data, columns=['OldPath', 'Path', 'Name', 'Size', 'Modified Date', 'Mtime', 'Fingerprint']
+    )
+    missing = sorted(set(missing_rows['Path']) - set(moved['OldPath']))
+    return LibraryDiff(
+        new.reset_index(drop=True), modified.reset_index(drop=True), moved, missing,
+        refreshed.reset_index(drop=True), files_requiring_confirmation
     )
 
-    messages =[]
 
-    # --- OPTIMIZATION: Vectorized Updates (No more slow loops!) ---
-    
-    if moved_data:
-        moved_df = pd.DataFrame(moved_data)
-        # Create fast lookup dictionaries
-        path_mapping = dict(zip(moved_df['OldPath'], moved_df['Path']))
-        size_mapping = dict(zip(moved_df['OldPath'], moved_df['Size']))
-        mod_mapping = dict(zip(moved_df['OldPath'], moved_df['Modified Date']))
-
-        # Apply updates instantly using .map()
-        mask = df['Path'].isin(path_mapping.keys())
-        df.loc[mask, 'Size'] = df.loc[mask, 'Path'].map(size_mapping)
-        df.loc[mask, 'Modified Date'] = df.loc[mask, 'Path'].map(mod_mapping)
-        df.loc[mask, 'Path'] = df.loc[mask, 'Path'].map(path_mapping)
-
-        messages.append(f"Database has been updated with {len(moved_data)} moved file(s).")
-    else:
-        messages.append("Database has been updated with 0 moved file(s).")
-
-    if new_data:
-        new_df = pd.DataFrame(new_data)
-        df = pd.concat([df, new_df], ignore_index=True)
-        messages.append(f"Database has been updated with {len(new_data)} new file(s).")
-    else:
-        messages.append("Database has been updated with 0 new file(s).")
-
-    if updated_data:
-        updated_df = pd.DataFrame(updated_data)
-        # Instant bulk update using index alignment
-        df.set_index('Path', inplace=True)
-        updated_df.set_index('Path', inplace=True)
-        df.update(updated_df)
-        df.reset_index(inplace=True)
-        messages.append(f"Database has been updated with {len(updated_data)} modified file(s).")
-    else:
-        messages.append("Database has been updated with 0 modified file(s).")
-
-    # Remove missing files that weren't moved
-    moved_old_paths = set(d['OldPath'] for d in moved_data)
-    remaining_missing_files = set(missing_files) - moved_old_paths
-    
-    if remaining_missing_files:
-        messages.append(f"Removing {len(remaining_missing_files)} missing file(s) from the database.")
-        df = df[~df['Path'].isin(remaining_missing_files)]
-    else:
-        messages.append("No missing files were removed.")
+def check_database_validity(directory, storage, df, changed_dirs=None):
+    """
+    Compare `df` with the files in `directory`. Neither is changed, so this can run on a
+    copy in a worker thread; apply the result with save_scan_diff. `changed_dirs` are listed
+    again even if the directory cache considers them unchanged (see DirectoryWatcher).
+
+    Returns (diff, error_message), where diff is a LibraryDiff.
+    """
+    if not os.path.exists(directory):
+        return None, f"The directory '{directory}' does not exist."
 
-    save_to_csv(df, csv_file)
+    settings = load_settings()
+    cache = None
+    if settings.get('scan_cache_hours'):
+        cache = DirectoryCache.load(directory_cache_path_for(storage.csv_file), settings['scan_cache_hours'])
+        cache.invalidate(changed_dirs or ())
 
-    # Collect duplicates
-    duplicates_to_confirm = find_duplicates(df)
+    # One walk of the tree; everything else is computed from its result
+    walked = set()
+    files = list(walk_directory(directory, settings.get('scan_workers', 1), cache, walked))
+    diff = reconcile(df, files, walked)
+    if cache is not None:
+        cache.save()
+    return diff, None
+
+
+def save_scan_diff(df, diff, storage):
+    """
+    Apply a diff from check_database_validity to `df` and persist the changes in one batch.
+    Returns the updated DataFrame.
+    """
+    df = diff.apply(df)
 
-    return df, messages, files_requiring_confirmation, duplicates_to_confirm, None
+    # Persist only the rows that changed (a full rewrite for the CSV engine)
+    storage.apply(df, changed=diff.changed_paths, deleted=diff.missing, renamed=diff.renamed)
+    if len(diff.refreshed):
+        storage.apply(df, changed=diff.refreshed['Path'].tolist(), columns=['Mtime', 'Fingerprint'])
+    return df
 
 
-def find_duplicates(df):
+def find_duplicates(df, hash_cache=None):
     """
-    Finds duplicates based on Name, Size, and DOI.
+    Finds duplicates based on identical contents, Name, and DOI.
     """
     duplicate_groups =[]
     processed_paths = set()
@@ -159,44 +401,35 @@ def find_duplicates(df):
                 duplicate_groups.append(group)
                 processed_paths.update(group['Path'].tolist())
 
-    # 1. Exact File Name Match (Fastest)
-    add_groups(df[df.duplicated(subset='Name', keep=False)].groupby('Name'))
+    # 1. Identical Contents (also catches renamed copies)
+    # Only files sharing a size can be identical, so the rest are never read
+    df_size = df[df['Size'] > 0]
+    same_size_paths = df_size.loc[df_size.duplicated(subset='Size', keep=False), 'Path']
+    if not same_size_paths.empty:
+        if hash_cache is None:
+            hash_cache = HashCache(hash_cache_path())
+        content_groups = find_identical_files(same_size_paths.tolist(), cache=hash_cache)
+        group_of_path = {path: number for number, group in enumerate(content_groups) for path in group}
+        df_content = df[df['Path'].isin(group_of_path.keys())]
+        add_groups(df_content.groupby(df_content['Path'].map(group_of_path)))
 
-    # 2. Exact File Size Match (Ignore files < 1KB to prevent false positives)
-    df_size = df[df['Size'] > 1000]
-    add_groups(df_size[df_size.duplicated(subset='Size', keep=False)].groupby('Size'))
+    # 2. Exact File Name Match
+    add_groups(df[df.duplicated(subset='Name', keep=False)].groupby('Name'))
 
     # 3. Exact DOI Match (Deepest)
-    # Safely extract DOIs, ignoring empty or missing BibTeX entries
-    if 'BibTeX' in df.columns:
-        extracted_dois = df['BibTeX'].astype(str).str.extract(r'doi\s*=\s*\{([^}]+)\}', flags=re.IGNORECASE)[0].str.strip()
-        valid_dois = extracted_dois.notna() & (extracted_dois != '')
-        
-        df_dois = df[valid_dois].copy()
-        df_dois['DOI_extracted'] = extracted_dois[valid_dois]
-        
-        add_groups(df_dois[df_dois.duplicated(subset='DOI_extracted', keep=False)].groupby('DOI_extracted'))
+    # The DOI column is kept up to date from the BibTeX, so nothing is parsed here
+    if 'DOI' in df.columns:
+        df_dois = df[df['DOI'].notna() & (df['DOI'] != '')]
+        add_groups(df_dois[df_dois.duplicated(subset='DOI', keep=False)].groupby('DOI'))
 
     return duplicate_groups
 
 
-def update_last_used_time(df, file_path, csv_file):
+def update_last_used_time(df, file_path, storage):
     """
     Update the 'Last Used Time' column for a given file in the DataFrame.
     """
-    current_time = pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+    current_time = pd.Timestamp.now().floor('s')
     df.loc[df['Path'] == file_path, 'Last Used Time'] = current_time
     
-    save_to_csv(df, csv_file)
-    
-    
-def save_to_csv(df, csv_file):
-    """
-    Save the given DataFrame to the specified CSV file.
-    """
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    csv_path = os.path.join(script_dir, csv_file)
-
-    df.to_csv(csv_path, index=False, encoding='utf-8')
-
-    return csv_path
+    storage.apply(df, changed=[file_path], columns=['Last Used Time'])
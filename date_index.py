@@ -0,0 +1,61 @@
+from bisect import bisect_left, insort
+
+import numpy as np
+import pandas as pd
+
+
+class DateIndex:
+    """
+    Paths sorted by the time in one datetime column ('Date Added', 'Last Used Time').
+
+    Built when the database is loaded and then refreshed only for the rows that
+    change, like TagIndex, so "everything since <time>" is a binary search and a
+    slice instead of a pass over the whole column.
+    """
+
+    def __init__(self, column):
+        self.column = column
+        self.entries = []  # sorted (time in ns, path)
+        self.times = {}
+
+    def rebuild(self, df):
+        self.entries = []
+        self.times = {}
+        if df.empty or self.column not in df.columns:
+            return
+        self.times = dict(zip(*self._times_of(df)))
+        self.entries = sorted((time, path) for path, time in self.times.items())
+
+    def update(self, df, paths):
+        """
+        Re-read the time of the rows of `df` with the given paths.
+        """
+        paths = set(paths)
+        self.discard(paths)
+        if not paths or df.empty or self.column not in df.columns:
+            return
+        mask = np.fromiter((path in paths for path in df['Path'].tolist()), dtype=bool, count=len(df))
+        for path, time in zip(*self._times_of(df[mask])):
+            self.times[path] = time
+            insort(self.entries, (time, path))
+
+    def discard(self, paths):
+        for path in paths:
+            time = self.times.pop(path, None)
+            if time is not None:
+                position = bisect_left(self.entries, (time, path))
+                del self.entries[position]
+
+    def _times_of(self, rows):
+        times = rows[self.column]
+        valid = times.notna().to_numpy(dtype=bool)
+        paths = rows['Path'].to_numpy(dtype=object)[valid].tolist()
+        nanoseconds = times[valid].to_numpy(dtype='datetime64[ns]').astype(np.int64).tolist()
+        return paths, nanoseconds
+
+    def paths_since(self, start):
+        """
+        Paths with a time at or after `start` (a Timestamp), newest first.
+        """
+        position = bisect_left(self.entries, (pd.Timestamp(start).value,))
+        return [path for _, path in reversed(self.entries[position:])]
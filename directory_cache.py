@@ -0,0 +1,123 @@
+import os
+import time
+import pickle
+
+CACHE_VERSION = 2
+
+# Directories modified this close to the scan may change again within the same
+# mtime tick, so their listing is not trusted on the next scan
+MTIME_GRACE_SECONDS = 2
+
+
+def directory_cache_path_for(csv_file):
+    """
+    Path of the directory-state cache stored next to the given CSV database.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, os.path.splitext(csv_file)[0] + '.dirs.pkl')
+
+
+class DirectoryCache:
+    """
+    Listing of every scanned directory, keyed by path and valid while the directory's
+    mtime is unchanged.
+
+    Adding, removing or renaming an entry changes the mtime of its directory, so an
+    unchanged directory is not listed again. Editing a file in place does not touch
+    the directory, so the files of a cached listing are still stat'ed, which is much
+    cheaper than listing the directory. The whole cache expires after `max_age_hours`.
+    """
+
+    def __init__(self, path, max_age_hours=24):
+        self.path = path
+        self.max_age = max_age_hours * 3600
+        self.created = time.time()
+        self.previous = {}
+        self.entries = {}
+
+    @classmethod
+    def load(cls, path, max_age_hours=24):
+        cache = cls(path, max_age_hours)
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as file:
+                    state = pickle.load(file)
+                if state.get('version') == CACHE_VERSION and time.time() - state['created'] < cache.max_age:
+                    cache.created = state['created']
+                    cache.previous = state['entries']
+            except Exception as e:
+                print(f"Ignoring unreadable directory cache {path}: {e}")
+        return cache
+
+    def save(self):
+        """
+        Save the directories listed since load(); directories that were not visited are dropped.
+        """
+        state = {'version': CACHE_VERSION, 'created': self.created, 'entries': self.entries}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def invalidate(self, dir_paths):
+        """
+        List these directories again even if their mtime did not change (e.g. a file in them was edited).
+        """
+        for dir_path in dir_paths:
+            self.previous.pop(dir_path, None)
+
+    def rotate(self, full=False):
+        """
+        Reuse this cache in memory for another walk: the listings of the last walk become
+        the reference, or none at all when `full` is set.
+        """
+        self.previous = {} if full else self.entries
+        self.entries = {}
+
+    def wrap(self, list_directory):
+        """
+        Wrap a directory-listing function (see database_utils.walk_directory) with the cache.
+        """
+        def cached_list_directory(dir_path):
+            try:
+                mtime_ns = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                return list_directory(dir_path)
+
+            entry = self.previous.get(dir_path)
+            if entry is not None and entry[0] == mtime_ns:
+                items = self._cached_items(dir_path, entry[1])
+                if items is not None:
+                    self.entries[dir_path] = entry
+                    return items
+
+            # mtime_ns was read before listing, so a change made meanwhile is caught next time
+            items = list_directory(dir_path)
+            if items is not None and time.time() - mtime_ns / 1e9 > MTIME_GRACE_SECONDS:
+                # Names only, in listing order; paths are rebuilt from dir_path
+                names = [os.path.basename(item) if isinstance(item, str) else item[1:] for item in items]
+                self.entries[dir_path] = (mtime_ns, names)
+            return items
+
+        return cached_list_directory
+
+    @staticmethod
+    def _cached_items(dir_path, names):
+        """
+        A cached listing with the current size and mtime of its files, which change when a
+        file is edited in place. None if a file is gone, so the directory is listed again.
+        """
+        # Same as os.path.join(dir_path, name), which is how scandir builds entry.path
+        prefix = os.path.join(dir_path, '')
+        items = []
+        for item in names:
+            if isinstance(item, str):
+                items.append(prefix + item)
+                continue
+            name, ext = item[0], item[1]
+            try:
+                stat = os.stat(prefix + name)
+            except OSError:
+                return None
+            items.append((prefix + name, name, ext, stat.st_size, stat.st_mtime_ns))
+        return items
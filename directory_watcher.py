@@ -0,0 +1,151 @@
+import os
+import time
+import threading
+
+from database_utils import SCAN_EXTENSIONS, walk_directory
+from directory_cache import DirectoryCache
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # watchdog is optional, the watcher polls without it
+    FileSystemEventHandler = object
+    Observer = None
+
+
+class _EventHandler(FileSystemEventHandler):
+    def __init__(self, watcher):
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.event_type in ('opened', 'closed_no_write'):
+            return
+        # A folder's own mtime changes with every entry added to it, which its file events already report
+        if event.is_directory and event.event_type == 'modified':
+            return
+        paths = [event.src_path, getattr(event, 'dest_path', '')]
+        self.watcher.notify([os.fsdecode(path) for path in paths if path], event.is_directory)
+
+
+class DirectoryWatcher:
+    """
+    Watches a library folder and reports which folders changed.
+
+    Uses watchdog (inotify on Linux) when it is installed and polls otherwise.
+    Events are coalesced: on_change(changed_dirs) is called from a background thread
+    once no event arrived for `settle_seconds` (or `max_delay` seconds after the first
+    one), so copying a thousand files produces a single call.
+    """
+
+    def __init__(self, directory, on_change, settle_seconds=2.0, max_delay=30.0, poll_seconds=10.0):
+        self.directory = directory
+        self.on_change = on_change
+        self.settle_seconds = settle_seconds
+        self.max_delay = max_delay
+        self.poll_seconds = poll_seconds
+        self.changed_dirs = set()
+        self.first_event = None
+        self.last_event = None
+        self.condition = threading.Condition()
+        self.stopped = False
+        self.observer = None
+        self.threads = []
+
+    @property
+    def mode(self):
+        return 'events' if Observer is not None else 'polling'
+
+    def start(self):
+        if Observer is not None:
+            self.observer = Observer()
+            self.observer.schedule(_EventHandler(self), self.directory, recursive=True)
+            self.observer.start()
+        else:
+            self.threads.append(threading.Thread(target=self._poll, daemon=True))
+        self.threads.append(threading.Thread(target=self._dispatch, daemon=True))
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join(timeout=2)
+        for thread in self.threads:
+            thread.join(timeout=2)
+
+    def notify(self, paths, is_directory=False):
+        """
+        Record a change to `paths`: their folders (and the paths themselves, for folders) are rescanned.
+        """
+        dirs = set()
+        for path in paths:
+            if is_directory:
+                dirs.add(path)
+            elif os.path.splitext(path)[1].lower() not in SCAN_EXTENSIONS:
+                continue
+            dirs.add(os.path.dirname(path))
+        if not dirs:
+            return
+        with self.condition:
+            now = time.monotonic()
+            if self.first_event is None:
+                self.first_event = now
+            self.last_event = now
+            self.changed_dirs |= dirs
+            self.condition.notify_all()
+
+    def _dispatch(self):
+        while True:
+            with self.condition:
+                while not self.stopped:
+                    if self.first_event is not None:
+                        now = time.monotonic()
+                        due = min(self.last_event + self.settle_seconds, self.first_event + self.max_delay)
+                        if now >= due:
+                            break
+                        self.condition.wait(due - now)
+                    else:
+                        self.condition.wait()
+                if self.stopped:
+                    return
+                changed_dirs = self.changed_dirs
+                self.changed_dirs = set()
+                self.first_event = self.last_event = None
+            try:
+                self.on_change(changed_dirs)
+            except Exception as e:
+                print(f"Error handling changes in {self.directory}: {e}")
+
+    def _poll(self):
+        """
+        Fallback without watchdog: walk the tree every `poll_seconds`, only listing folders
+        whose mtime changed (see DirectoryCache), and list everything every tenth round.
+        """
+        cache = DirectoryCache(path=None)
+        known = None
+        rounds = 0
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+            cache.rotate(full=rounds % 10 == 0)
+            walked = set()
+            try:
+                current = {path: (size, mtime) for path, _, _, size, mtime in walk_directory(self.directory, cache=cache, walked=walked)}
+            except OSError as e:
+                print(f"Error polling {self.directory}: {e}")
+                current = known
+            if self.directory not in walked:
+                current = known  # The directory itself is unavailable: wait until it's back
+            if known is not None and current is not None:
+                changed = [path for path in current.keys() ^ known.keys()]
+                changed += [path for path in current.keys() & known.keys() if current[path] != known[path]]
+                if changed:
+                    self.notify(changed)
+            known = current
+            rounds += 1
+            with self.condition:
+                self.condition.wait(self.poll_seconds)
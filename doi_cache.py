@@ -0,0 +1,91 @@
+import os
+import time
+import sqlite3
+from contextlib import closing
+
+from utils import parse_doi_from_bibtex
+from file_hashing import quick_fingerprint
+
+
+def doi_cache_path():
+    """
+    Path of the DOI cache. It is shared by all libraries, so it lives next to the scripts.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, 'doi_cache.sqlite')
+
+
+class DOICache:
+    """
+    On-disk cache of extracted BibTeX entries keyed by file fingerprint (see file_hashing.py).
+
+    A paper that is re-added, renamed or copied into another library keeps its fingerprint,
+    so its BibTeX is reused instead of running pdf2doi again. Only successful extractions
+    are stored; the least recently used entries are dropped beyond `max_entries`.
+    """
+
+    def __init__(self, path, max_entries=50000):
+        self.path = path
+        self.max_entries = max_entries
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(fingerprint TEXT PRIMARY KEY, doi TEXT, bibtex TEXT, last_used REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    @staticmethod
+    def fingerprint(path):
+        """
+        Fingerprint of the file at `path`, or None if it cannot be read.
+        """
+        try:
+            return quick_fingerprint(path)
+        except OSError as e:
+            print(f"Error fingerprinting {path}: {e}")
+            return None
+
+    def get(self, fingerprint):
+        """
+        Cached BibTeX for `fingerprint`, or None on a miss.
+        """
+        if fingerprint is None:
+            return None
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute('SELECT bibtex FROM entries WHERE fingerprint = ?', (fingerprint,)).fetchone()
+            if row is None:
+                return None
+            conn.execute('UPDATE entries SET last_used = ? WHERE fingerprint = ?', (time.time(), fingerprint))
+            return row[0]
+
+    def put(self, fingerprint, bib_info):
+        if fingerprint is None or not bib_info:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (fingerprint, doi, bibtex, last_used) VALUES (?, ?, ?, ?)',
+                (fingerprint, parse_doi_from_bibtex(bib_info), bib_info, time.time())
+            )
+            self._evict(conn)
+
+    def invalidate(self, fingerprint):
+        """
+        Forget the entry for one fingerprint, so the file is extracted again next time.
+        """
+        if fingerprint is None:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM entries WHERE fingerprint = ?', (fingerprint,))
+
+    def _evict(self, conn):
+        count = conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        if count > self.max_entries:
+            conn.execute(
+                'DELETE FROM entries WHERE fingerprint IN '
+                '(SELECT fingerprint FROM entries ORDER BY last_used LIMIT ?)',
+                (count - self.max_entries,)
+            )
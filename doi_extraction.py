@@ -0,0 +1,131 @@
+import os
+import time
+import multiprocessing
+from multiprocessing.connection import wait
+
+from utils import extract_doi
+
+
+def _worker(conn):
+    """
+    Worker process: extract DOIs for the paths received on `conn` until it is closed.
+    """
+    while True:
+        try:
+            path = conn.recv()
+        except EOFError:
+            break
+        if path is None:
+            break
+        # Report the start, so the timeout does not count the worker's startup time
+        conn.send(('started', path))
+        conn.send(('done', path, extract_doi(path)))
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.path = None
+        self.started = None
+
+    def submit(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self.conn.send(path)
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except (OSError, BrokenPipeError):
+            pass
+        self.conn.close()
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.terminate()
+
+    def kill(self):
+        self.process.terminate()
+        self.process.join()
+        self.conn.close()
+
+
+def extract_dois_parallel(paths, on_result, max_workers=None, timeout=120, should_stop=None, cache=None):
+    """
+    Run extract_doi over `paths` in a pool of worker processes.
+
+    Each worker has its own pipe, so a file that exceeds `timeout` seconds (or crashes
+    its worker) only costs that worker, which is killed and replaced; the rest of the
+    batch carries on. on_result(path, bib_info, error) is called from this thread for
+    every file: bib_info is None when the file timed out or failed.
+
+    With a DOICache, files whose fingerprint is already cached are answered from it
+    without starting a worker, and successful extractions are added to it.
+    """
+    fingerprints = {}
+    if cache is not None:
+        misses = []
+        for path in paths:
+            fingerprints[path] = cache.fingerprint(path)
+            bib_info = cache.get(fingerprints[path])
+            if bib_info is not None:
+                on_result(path, bib_info, None)
+            else:
+                misses.append(path)
+        paths = misses
+        if not paths:
+            return
+
+    def finish(path, bib_info):
+        if cache is not None:
+            cache.put(fingerprints.get(path), bib_info)
+        on_result(path, bib_info, None)
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(paths)))
+    context = multiprocessing.get_context('spawn')
+    pending = list(reversed(paths))
+    idle = [_Worker(context) for _ in range(max_workers)]
+    busy = {}
+
+    try:
+        while pending or busy:
+            if should_stop is not None and should_stop():
+                break
+
+            while pending and idle:
+                worker = idle.pop()
+                worker.submit(pending.pop())
+                busy[worker.conn] = worker
+
+            for conn in wait(list(busy), timeout=0.5):
+                worker = busy[conn]
+                try:
+                    message = conn.recv()
+                except (EOFError, OSError):
+                    # The worker died while extracting this file
+                    del busy[conn]
+                    on_result(worker.path, None, "extraction process crashed")
+                    worker.kill()
+                    idle.append(_Worker(context))
+                    continue
+                if message[0] == 'started':
+                    worker.started = time.monotonic()
+                else:
+                    del busy[conn]
+                    finish(message[1], message[2])
+                    idle.append(worker)
+
+            now = time.monotonic()
+            for conn, worker in list(busy.items()):
+                if now - worker.started > timeout:
+                    del busy[conn]
+                    on_result(worker.path, None, f"timed out after {timeout} s")
+                    worker.kill()
+                    idle.append(_Worker(context))
+    finally:
+        for worker in idle:
+            worker.stop()
+        for worker in busy.values():
+            worker.kill()
@@ -0,0 +1,371 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from bibtex_parser import BIBTEX_COLUMNS
+from database_utils import check_database_validity, find_duplicates, save_scan_diff, update_last_used_time
+from date_index import DateIndex
+from doi_cache import DOICache, doi_cache_path
+from doi_extraction import extract_dois_parallel
+from file_hashing import HashCache, hash_cache_path
+from fulltext_index import FullTextIndex, fulltext_path_for
+from search_index import SearchCorpus, TrigramIndex, index_path_for
+from search_query import filter_mask
+from storage import open_storage
+from tag_index import TagIndex
+from utils import generate_safe_filename_from_directory, load_settings, set_bibtex_metadata
+
+
+class Library:
+    """
+    One scanned directory: its database and the in-memory indexes kept over it.
+
+    Everything here runs without a display. The window (pdf_search_app.py) and the
+    command line (cli.py) both work through a Library; neither touches the indexes
+    directly, so they can't fall out of step with the DataFrame.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = None
+        self.csv_file = None
+        self.storage = None
+        self.df = pd.DataFrame()
+        self.search_index = None
+        self.doi_cache = None
+        self.search_corpus = SearchCorpus()
+        self.tag_index = TagIndex()
+        self.added_index = DateIndex('Date Added')
+        self.opened_index = DateIndex('Last Used Time')
+        # Row position of every path in df, for lookups by path (None: rebuilt on next use)
+        self.row_positions = None
+        self.scorer = None
+        if directory:
+            self.open(directory)
+
+    def open(self, directory):
+        """
+        Switch to the database of `directory` and load it.
+        """
+        csv_file = generate_safe_filename_from_directory(directory)
+        storage = open_storage(csv_file)
+        df = storage.load()
+        # Switched together once loaded: the window may close while this runs in the
+        # background, and the storage must never be closed with another library's rows
+        self.directory, self.csv_file, self.storage, self.df = directory, csv_file, storage, df
+        self.rebuild_indexes()
+
+    def close(self):
+        # Let the storage engine flush pending work (e.g. fold the CSV journal)
+        if self.storage:
+            self.storage.close(self.df)
+
+    def _indexes(self):
+        return (self.search_corpus, self.tag_index, self.added_index, self.opened_index)
+
+    def rebuild_indexes(self):
+        for index in self._indexes():
+            index.rebuild(self.df)
+        self.row_positions = self._build_row_positions()
+
+    def refresh_rows(self, changed=(), removed=()):
+        """
+        Bring the indexes in line with rows that were removed (or moved away from
+        their old path) and rows that were added or edited.
+        """
+        for index in self._indexes():
+            if removed:
+                index.discard(removed)
+            if changed:
+                index.update(self.df, changed)
+        # Edited rows keep their position; removing or adding rows shifts or extends them
+        positions = self.row_positions
+        if positions is not None and (removed or any(path not in positions for path in changed)):
+            self.row_positions = None
+
+    def _build_row_positions(self):
+        if 'Path' not in self.df.columns:
+            return {}
+        return dict(zip(self.df['Path'].tolist(), range(len(self.df))))
+
+    def _positions(self):
+        positions = self.row_positions
+        if positions is None or len(positions) != len(self.df):
+            positions = self.row_positions = self._build_row_positions()
+        return positions
+
+    # --- Scan and reconcile ---
+
+    def scan(self, changed_dirs=None):
+        """
+        Reconcile the database with the files in the directory: scan_changes, then apply_scan.
+        Returns (diff, duplicate groups, messages); raises RuntimeError if the directory
+        can't be scanned.
+        """
+        diff, duplicates, messages = self.scan_changes(changed_dirs)
+        self.apply_scan(diff, changed_dirs)
+        return diff, duplicates, messages
+
+    def scan_changes(self, changed_dirs=None, df=None):
+        """
+        Compare `df` (default: a copy of the database) with the files in the directory and
+        collect the duplicates and full-text index of the result. The database is left as it
+        is, so this can run in a worker thread on a copy taken beforehand.
+        With `changed_dirs` (from DirectoryWatcher) those folders are listed again.
+        """
+        df = self.df.copy() if df is None else df
+        diff, error_message = check_database_validity(self.directory, self.storage, df, changed_dirs)
+        if error_message:
+            raise RuntimeError(error_message)
+        messages = diff.messages()
+        df = diff.apply(df)
+
+        # Forget the hashes of files that are gone, then collect duplicates
+        hash_cache = HashCache(hash_cache_path())
+        hash_cache.prune(self.directory, df['Path'].tolist())
+        duplicates = find_duplicates(df, hash_cache)
+
+        # Optional content-indexing stage: only new and changed PDFs are read
+        if load_settings().get('fulltext_index'):
+            indexed = FullTextIndex(fulltext_path_for(self.csv_file)).update(df)
+            messages.append(f"Indexed the text of {indexed} new or modified PDF(s).")
+        return diff, duplicates, messages
+
+    def apply_scan(self, diff, changed_dirs=None):
+        """
+        Apply a diff from scan_changes to the current database, keeping the edits made while
+        it was computed, and save it. With `changed_dirs` only the rows that appeared or
+        disappeared are re-indexed.
+        """
+        self.df = save_scan_diff(self.df, diff, self.storage)
+        if changed_dirs:
+            self.refresh_rows(changed=diff.added_paths, removed=diff.missing + list(diff.renamed))
+        else:
+            self.rebuild_indexes()
+
+    # --- Search ---
+
+    def search(self, query, threshold, fulltext=False, df=None, use_index=True):
+        """
+        Run a parsed SearchQuery: the planner's filters first (see search_query.py),
+        then full-text or fuzzy matching only on the rows that are left.
+        """
+        if df is None:
+            df = self.df
+        if query.is_plain and not fulltext:
+            return self.fuzzy_search(df, query.keywords, threshold, use_index)
+
+        rows = filter_mask(df, query, self.tag_index, self.search_corpus.texts_for, phrases=not fulltext)
+        if fulltext:
+            terms = query.keywords + query.phrases
+            return self.fulltext_search(df[rows], terms) if terms else df[rows].reset_index(drop=True)
+        if not query.keywords:
+            return df[rows].reset_index(drop=True)
+        return self.fuzzy_search(df, query.keywords, threshold, use_index, rows=rows)
+
+    def fuzzy_search(self, df, keywords, threshold=70, use_index=True, rows=None):
+        keywords = [keyword.lower() for keyword in keywords]
+
+        # OPTIMIZATION 1: Reuse the lowercased search text cached when the database was loaded
+        combined_text = self.search_corpus.texts_for(df)
+
+        # OPTIMIZATION 2: Let the trigram index shortlist rows that can still reach the threshold
+        mask = pd.Series(False, index=df.index)
+        index = self.get_search_index() if use_index else None
+        if index is not None:
+            index.sync(df['Path'], combined_text, self.search_corpus.hashes_for(df))
+            candidates = index.candidate_mask(keywords, threshold)
+        else:
+            candidates = np.ones(len(df), dtype=bool)
+        # Rows already ruled out by the query's filters are never scored
+        if rows is not None:
+            candidates = candidates & rows
+
+        # OPTIMIZATION 3: Score the shortlist in one batch (see search_scorers.py)
+        if self.scorer is None:
+            # Imported on first search: fuzzywuzzy and rapidfuzz aren't needed to start up
+            from search_scorers import get_scorer
+            self.scorer = get_scorer()
+        mask[candidates] = self.scorer.match(combined_text[candidates], keywords, threshold)
+        return df[mask].reset_index(drop=True)
+
+    def refine_search(self, previous_matches, keywords, threshold):
+        """
+        Fuzzy search for `keywords` among the rows of an earlier search, for a query that
+        refines it (see search_query.refines). Rows whose text has characters the scorer
+        deletes are rescored too, since they can gain a match as the query grows.
+        """
+        paths = set(previous_matches['Path'].tolist()) | self.search_corpus.joining_paths
+        return self.fuzzy_search(self.rows_with_paths(paths), keywords, threshold, use_index=False)
+
+    def fulltext_search(self, df, keywords):
+        """
+        Rows whose PDF text contains all keywords, from the index built by scan().
+        """
+        if not self.csv_file or not os.path.exists(fulltext_path_for(self.csv_file)):
+            raise RuntimeError(
+                "No full-text index for this directory. Set \"fulltext_index\": true in "
+                "settings.json and run Update Database."
+            )
+        paths = FullTextIndex(fulltext_path_for(self.csv_file)).search(keywords)
+        return df[df['Path'].isin(paths)].reset_index(drop=True)
+
+    def get_search_index(self):
+        """
+        Return the trigram index of the current database, loading it from disk on first use.
+        """
+        if not self.csv_file:
+            return None
+        index_path = index_path_for(self.csv_file)
+        if self.search_index is None or self.search_index.path != index_path:
+            self.search_index = TrigramIndex.load(index_path)
+        return self.search_index
+
+    def rows_with_paths(self, paths):
+        """
+        The rows of `paths` in database order, looked up by position: the cost depends on
+        the number of paths, not on the size of the library.
+        """
+        positions = self._positions()
+        rows = sorted(positions[path] for path in paths if path in positions)
+        return self.df.iloc[rows].copy()
+
+    def recent_rows(self, date_index, days):
+        """
+        Rows whose date in `date_index` falls within the last `days` days, newest first.
+        """
+        # OPTIMIZATION: a binary search in the sorted date index instead of parsing the column
+        paths = date_index.paths_since(pd.Timestamp.now() - pd.Timedelta(days=days))
+        positions = self._positions()
+        return self.df.iloc[[positions[path] for path in paths if path in positions]].reset_index(drop=True)
+
+    # --- Duplicates ---
+
+    def find_duplicates(self, df=None):
+        """
+        Duplicate groups in `df` (default: the database). Pass a copy to run this in a
+        worker thread while the database keeps being edited.
+        """
+        return find_duplicates(self.df if df is None else df)
+
+    def forget(self, paths):
+        """
+        Drop the rows of files that were deleted from disk.
+        """
+        paths = set(paths)
+        if paths:
+            self.df = self.df[~self.df['Path'].isin(paths)]
+            self.refresh_rows(removed=paths)
+        self.storage.apply(self.df, deleted=list(paths))
+
+    # --- Edits ---
+
+    def set_comments(self, path, comments):
+        self.df.loc[self.df['Path'] == path, 'Comments'] = comments
+        self.refresh_rows(changed=[path])
+        self.storage.apply(self.df, changed=[path], columns=['Comments'])
+
+    def set_bibtex(self, path, bib_info):
+        """
+        Replace the BibTeX of one file by hand, including in the DOI cache.
+        """
+        self.apply_bibtex({path: bib_info})
+        self.save_bibtex([path])
+        self.update_doi_cache(path, bib_info)
+
+    def mark_opened(self, path):
+        update_last_used_time(self.df, path, self.storage)
+        self.opened_index.update(self.df, [path])
+
+    def rename(self, old_path, new_path):
+        """
+        Record that a file was moved to `new_path` (the move itself is up to the caller).
+        """
+        self.df.loc[self.df['Path'] == old_path, 'Path'] = new_path
+        self.refresh_rows(changed=[new_path], removed=[old_path])
+        self.storage.apply(self.df, renamed={old_path: new_path})
+
+    # --- DOI extraction ---
+
+    def get_doi_cache(self):
+        if self.doi_cache is None:
+            self.doi_cache = DOICache(doi_cache_path(), max_entries=load_settings().get('doi_cache_entries'))
+        return self.doi_cache
+
+    def update_doi_cache(self, file_path, bib_info):
+        """
+        Keep the DOI cache in line with a manual BibTeX edit, so copies of this file get the corrected entry.
+        """
+        if not os.path.exists(file_path):
+            return
+        cache = self.get_doi_cache()
+        fingerprint = cache.fingerprint(file_path)
+        if bib_info:
+            cache.put(fingerprint, bib_info)
+        else:
+            cache.invalidate(fingerprint)
+
+    def apply_bibtex(self, bib_by_path):
+        """
+        Set the BibTeX (and the columns materialized from it) of the given paths in memory.
+        Call save_bibtex once the batch is complete.
+        """
+        mask = self.df['Path'].isin(bib_by_path.keys())
+        if mask.any():
+            self.df.loc[mask, 'BibTeX'] = self.df.loc[mask, 'Path'].map(bib_by_path)
+            set_bibtex_metadata(self.df, mask)
+
+    def save_bibtex(self, paths):
+        self.refresh_rows(changed=paths)
+        self.storage.apply(self.df, changed=paths, columns=['BibTeX'] + BIBTEX_COLUMNS)
+
+    def pending_doi_paths(self):
+        """
+        PDFs that never went through DOI extraction.
+        """
+        mask = self.df['BibTeX'].isna() & self.df['Path'].str.lower().str.endswith('.pdf')
+        return self.df.loc[mask, 'Path'].tolist()
+
+    def extract_dois(self, paths=None, progress=None):
+        """
+        Extract the DOIs of `paths` (default: pending_doi_paths()) and save them in one batch,
+        blocking until done. progress(path, bib_info, error) is called for every file.
+        Paths that aren't files of this library are reported as failures.
+        Returns (extracted paths, [(path, error)]).
+        """
+        bib_by_path = {}
+        failures = []
+        if paths is None:
+            paths = self.pending_doi_paths()
+        else:
+            # Given by hand (e.g. relative to the working directory): match them to the stored paths
+            stored = {os.path.abspath(path): path for path in self.df['Path'].tolist()}
+            known = {}
+            for path in paths:
+                if os.path.abspath(path) in stored:
+                    known[stored[os.path.abspath(path)]] = None
+                else:
+                    failures.append((path, "Not a file of this library"))
+                    if progress:
+                        progress(path, None, failures[-1][1])
+            paths = list(known)
+
+        def on_result(path, bib_info, error):
+            if bib_info is not None:
+                bib_by_path[path] = bib_info
+            if error:
+                failures.append((path, error))
+            if progress:
+                progress(path, bib_info, error)
+
+        if paths:
+            settings = load_settings()
+            extract_dois_parallel(
+                paths, on_result,
+                max_workers=settings.get('doi_workers'),
+                timeout=settings.get('doi_timeout'),
+                cache=self.get_doi_cache()
+            )
+            self.apply_bibtex(bib_by_path)
+            self.save_bibtex(list(bib_by_path))
+        return list(bib_by_path), failures
@@ -0,0 +1,189 @@
+import os
+import hashlib
+import sqlite3
+import concurrent.futures
+from contextlib import closing
+
+# Bytes read from each end of a file for its quick fingerprint
+BLOCK_SIZE = 64 * 1024
+
+
+def quick_fingerprint(path, size=None):
+    """
+    Cheap content fingerprint: the file size plus a hash of its first and last blocks.
+
+    Reads at most 2 * BLOCK_SIZE bytes, so it is fast enough to compute for every new
+    file, and it survives renames, moves and copies between libraries.
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        digest.update(file.read(BLOCK_SIZE))
+        if size > BLOCK_SIZE:
+            file.seek(max(BLOCK_SIZE, size - BLOCK_SIZE))
+            digest.update(file.read(BLOCK_SIZE))
+    return f"{size}:{digest.hexdigest()}"
+
+
+def full_hash(path):
+    """
+    Hash of the whole file.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_cache_path():
+    """
+    Path of the hash cache. Paths are absolute, so one cache serves all libraries.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, 'file_hashes.sqlite')
+
+
+class HashCache:
+    """
+    Quick and full hashes per path, valid while the file keeps the same size and mtime.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS hashes '
+                '(path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, quick TEXT, full TEXT)'
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def lookup(self, paths):
+        """
+        Cached (size, mtime_ns, quick, full) for each of `paths` that has an entry.
+        """
+        entries = {}
+        paths = list(paths)
+        with closing(self._connect()) as conn:
+            for start in range(0, len(paths), 500):
+                chunk = paths[start:start + 500]
+                rows = conn.execute(
+                    f"SELECT path, size, mtime_ns, quick, full FROM hashes WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+                entries.update((row[0], row[1:]) for row in rows)
+        return entries
+
+    def store(self, entries):
+        """
+        Save {path: (size, mtime_ns, quick, full)} entries.
+        """
+        if not entries:
+            return
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO hashes (path, size, mtime_ns, quick, full) VALUES (?, ?, ?, ?, ?)',
+                [(path,) + tuple(entry) for path, entry in entries.items()]
+            )
+
+    def prune(self, directory, live_paths):
+        """
+        Drop the entries of files under `directory` that are not in `live_paths` any more
+        (deleted or moved away). Entries of other directories are left alone: the cache is
+        shared by every library.
+        """
+        prefix = os.path.join(directory, '')
+        live_paths = set(live_paths)
+        with closing(self._connect()) as conn, conn:
+            # A range scan on the primary key instead of LIKE, which would need escaping
+            rows = conn.execute(
+                'SELECT path FROM hashes WHERE path >= ? AND path < ?', (prefix, prefix + '\U0010ffff')
+            )
+            stale = [(path,) for (path,) in rows if path not in live_paths]
+            conn.executemany('DELETE FROM hashes WHERE path = ?', stale)
+        return len(stale)
+
+
+def _groups_by(paths, key):
+    groups = {}
+    for path in paths:
+        groups.setdefault(key(path), []).append(path)
+    return [group for group in groups.values() if len(group) > 1]
+
+
+def find_identical_files(paths, cache=None, max_workers=4):
+    """
+    Groups of paths whose contents are byte-for-byte identical (by hash).
+
+    Files are grouped by size first, then by their quick fingerprint, and only the
+    files that still collide are hashed in full. With a HashCache, hashes of files
+    whose size and mtime did not change are not recomputed.
+    """
+    stats = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        # Empty files are all identical and never worth reporting
+        if stat.st_size > 0:
+            stats[path] = (stat.st_size, stat.st_mtime_ns)
+
+    size_groups = _groups_by(stats, lambda path: stats[path][0])
+    if not size_groups:
+        return []
+
+    candidates = [path for group in size_groups for path in group]
+    cached = cache.lookup(candidates) if cache is not None else {}
+    hashes = {}
+    for path in candidates:
+        entry = cached.get(path)
+        if entry is not None and tuple(entry[:2]) == stats[path]:
+            hashes[path] = [entry[2], entry[3]]
+        else:
+            hashes[path] = [None, None]
+    changed = set()
+
+    def quick(path):
+        if hashes[path][0] is None:
+            try:
+                hashes[path][0] = quick_fingerprint(path, stats[path][0])
+                changed.add(path)
+            except OSError:
+                return path  # unreadable: never equal to another file
+        return hashes[path][0]
+
+    quick_groups = [group for size_group in size_groups for group in _groups_by(size_group, quick)]
+
+    # The quick fingerprint already covers every byte of small files
+    needs_full = [
+        path for group in quick_groups for path in group
+        if stats[path][0] > 2 * BLOCK_SIZE and hashes[path][1] is None
+    ]
+
+    def compute_full(path):
+        try:
+            return path, full_hash(path)
+        except OSError:
+            return path, None
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for path, digest in executor.map(compute_full, needs_full):
+            if digest is not None:
+                hashes[path][1] = digest
+                changed.add(path)
+
+    def full(path):
+        if stats[path][0] <= 2 * BLOCK_SIZE:
+            return hashes[path][0]
+        return hashes[path][1] or path
+
+    identical = [group for quick_group in quick_groups for group in _groups_by(quick_group, full)]
+
+    if cache is not None:
+        cache.store({path: stats[path] + tuple(hashes[path]) for path in changed})
+    return identical
@@ -0,0 +1,151 @@
+import os
+import sqlite3
+import concurrent.futures
+from contextlib import closing
+
+# Text kept per document; enough for abstract and body, bounded for memory and disk
+MAX_CHARS_PER_DOCUMENT = 300000
+COMMIT_EVERY = 50
+
+
+def fulltext_path_for(csv_file):
+    """
+    Path of the full-text index stored next to the given CSV database.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(script_dir, os.path.splitext(csv_file)[0] + '.fulltext.sqlite')
+
+
+def extract_text(pdf_path):
+    """
+    Extract plain text from a PDF. Runs in a worker process, so it must stay a module-level function.
+    """
+    try:
+        try:
+            import pymupdf
+        except ImportError:
+            import fitz as pymupdf  # older PyMuPDF releases (installed with pdf2doi)
+
+        parts = []
+        length = 0
+        with pymupdf.open(pdf_path) as document:
+            for page in document:
+                text = page.get_text()
+                parts.append(text)
+                length += len(text)
+                if length >= MAX_CHARS_PER_DOCUMENT:
+                    break
+        return ''.join(parts)[:MAX_CHARS_PER_DOCUMENT]
+    except Exception as e:
+        print(f"Error extracting text from {pdf_path}: {e}")
+        return ''
+
+
+class FullTextIndex:
+    """
+    SQLite FTS5 index of PDF contents, keyed by path and modification date.
+
+    update() only extracts files that are new or whose 'Modified Date' changed since
+    they were indexed, using a process pool with a bounded number of files in flight.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS documents '
+                '(id INTEGER PRIMARY KEY, path TEXT UNIQUE, modified TEXT, size INTEGER)'
+            )
+            # The text of document `id` is stored at rowid `id`
+            conn.execute('CREATE VIRTUAL TABLE IF NOT EXISTS contents USING fts5(body)')
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=30)
+
+    def update(self, df, max_workers=None, progress=None):
+        """
+        Bring the index in line with the PDFs listed in `df`. Returns the number of files extracted.
+        """
+        pdfs = df[df['Path'].str.lower().str.endswith('.pdf')]
+        current = {
+            path: (str(modified), int(size))
+            for path, modified, size in zip(pdfs['Path'], pdfs['Modified Date'], pdfs['Size'])
+        }
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute('SELECT path, modified, size FROM documents')
+            indexed = {path: (modified, size) for path, modified, size in rows}
+
+        removed = [path for path in indexed if path not in current]
+        pending = [path for path, version in current.items() if indexed.get(path) != version]
+
+        with closing(self._connect()) as conn, conn:
+            self._delete(conn, removed)
+
+        if not pending:
+            return 0
+
+        done = 0
+        max_workers = max_workers or os.cpu_count() or 1
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor, \
+                closing(self._connect()) as conn:
+            pending_iter = iter(pending)
+            in_flight = {}
+
+            def submit_next():
+                path = next(pending_iter, None)
+                if path is not None:
+                    in_flight[executor.submit(extract_text, path)] = path
+
+            # Keep only a couple of documents per worker in memory at any time
+            for _ in range(max_workers * 2):
+                submit_next()
+
+            while in_flight:
+                finished, _ = concurrent.futures.wait(in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in finished:
+                    path = in_flight.pop(future)
+                    try:
+                        text = future.result()
+                    except Exception as e:
+                        print(f"Error extracting text from {path}: {e}")
+                        text = ''
+                    self._store(conn, path, current[path], text)
+                    done += 1
+                    if done % COMMIT_EVERY == 0:
+                        conn.commit()
+                    if progress:
+                        progress(done, len(pending))
+                    submit_next()
+            conn.commit()
+        return done
+
+    def _delete(self, conn, paths):
+        for path in paths:
+            row = conn.execute('SELECT id FROM documents WHERE path = ?', (path,)).fetchone()
+            if row is not None:
+                conn.execute('DELETE FROM contents WHERE rowid = ?', row)
+                conn.execute('DELETE FROM documents WHERE id = ?', row)
+
+    def _store(self, conn, path, version, text):
+        self._delete(conn, [path])
+        modified, size = version
+        cursor = conn.execute(
+            'INSERT INTO documents (path, modified, size) VALUES (?, ?, ?)', (path, modified, size)
+        )
+        conn.execute('INSERT INTO contents (rowid, body) VALUES (?, ?)', (cursor.lastrowid, text))
+
+    def search(self, keywords):
+        """
+        Paths of documents containing every keyword (as a word prefix).
+        """
+        terms = ['"' + keyword.replace('"', '""') + '"*' for keyword in keywords]
+        if not terms:
+            return set()
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                'SELECT documents.path FROM contents JOIN documents ON documents.id = contents.rowid '
+                'WHERE contents MATCH ?', (' AND '.join(terms),)
+            )
+            return {path for (path,) in rows}
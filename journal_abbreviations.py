@@ -0,0 +1,251 @@
+import csv
+import glob
+import os
+import re
+import shutil
+from functools import lru_cache
+
+# Built-in full name -> abbreviation table. More entries are loaded from
+# journal_abbreviations*.csv files next to the scripts (see load_abbreviation_table);
+# `python journal_abbreviations.py --download` fetches JabRef's lists there.
+EXACT_MATCHES = {
+    "Physical Review A": "Phys. Rev. A",
+    "Physical Review B": "Phys. Rev. B",
+    "Physical Review C": "Phys. Rev. C",
+    "Physical Review D": "Phys. Rev. D",
+    "Physical Review E": "Phys. Rev. E",
+    "Physical Review X": "Phys. Rev. X",
+    "Physical Review Letters": "Phys. Rev. Lett.",
+    "Physical Review Applied": "Phys. Rev. Appl.",
+    "Physical Review Research": "Phys. Rev. Res.",
+    "Physical Review Materials": "Phys. Rev. Mater.",
+    "Physical Review Fluids": "Phys. Rev. Fluids",
+    "Reviews of Modern Physics": "Rev. Mod. Phys.",
+    "Applied Physics Letters": "Appl. Phys. Lett.",
+    "Journal of Applied Physics": "J. Appl. Phys.",
+    "Journal of Chemical Physics": "J. Chem. Phys.",
+    "The Journal of Chemical Physics": "J. Chem. Phys.",
+    "New Journal of Physics": "New J. Phys.",
+    "Physics of Fluids": "Phys. Fluids",
+    "Physics Reports": "Phys. Rep.",
+    "Reports on Progress in Physics": "Rep. Prog. Phys.",
+    "Journal of Physics: Condensed Matter": "J. Phys.: Condens. Matter",
+    "Journal of Fluid Mechanics": "J. Fluid Mech.",
+    "Europhysics Letters": "EPL",
+    "Communications Physics": "Commun. Phys.",
+    "Optics Letters": "Opt. Lett.",
+    "Optics Express": "Opt. Express",
+    "Optics Communications": "Opt. Commun.",
+    "Applied Optics": "Appl. Opt.",
+    "Optica": "Optica",
+    "Journal of Optics": "J. Opt.",
+    "Journal of the Optical Society of America A": "J. Opt. Soc. Am. A",
+    "Journal of the Optical Society of America B": "J. Opt. Soc. Am. B",
+    "Journal of Lightwave Technology": "J. Lightwave Technol.",
+    "Laser & Photonics Reviews": "Laser Photonics Rev.",
+    "Photonics Research": "Photonics Res.",
+    "Nanophotonics": "Nanophotonics",
+    "ACS Photonics": "ACS Photonics",
+    "ACS Nano": "ACS Nano",
+    "Nano Letters": "Nano Lett.",
+    "Nature": "Nature",
+    "Science": "Science",
+    "Science Advances": "Sci. Adv.",
+    "Scientific Reports": "Sci. Rep.",
+    "Nature Physics": "Nat. Phys.",
+    "Nature Photonics": "Nat. Photonics",
+    "Nature Materials": "Nat. Mater.",
+    "Nature Nanotechnology": "Nat. Nanotechnol.",
+    "Nature Communications": "Nat. Commun.",
+    "Nature Reviews Materials": "Nat. Rev. Mater.",
+    "Proceedings of the National Academy of Sciences": "Proc. Natl. Acad. Sci. U.S.A.",
+    "Proceedings of the National Academy of Sciences of the United States of America": "Proc. Natl. Acad. Sci. U.S.A.",
+    "Light: Science & Applications": "Light Sci. Appl.",
+    "Advanced Materials": "Adv. Mater.",
+    "Advanced Optical Materials": "Adv. Opt. Mater.",
+    "Advanced Functional Materials": "Adv. Funct. Mater.",
+    "Soft Matter": "Soft Matter",
+    "Langmuir": "Langmuir",
+    "Liquid Crystals": "Liq. Cryst.",
+    "Liquid Crystals Reviews": "Liq. Cryst. Rev.",
+    "Molecular Crystals and Liquid Crystals": "Mol. Cryst. Liq. Cryst.",
+    "The European Physical Journal E": "Eur. Phys. J. E",
+    "Journal of the American Chemical Society": "J. Am. Chem. Soc.",
+    "Angewandte Chemie International Edition": "Angew. Chem. Int. Ed.",
+    "Chemical Reviews": "Chem. Rev.",
+    "Chemical Society Reviews": "Chem. Soc. Rev.",
+    "Physical Chemistry Chemical Physics": "Phys. Chem. Chem. Phys.",
+    "The Journal of Physical Chemistry B": "J. Phys. Chem. B",
+    "Journal of Materials Chemistry C": "J. Mater. Chem. C",
+    "Annual Review of Condensed Matter Physics": "Annu. Rev. Condens. Matter Phys.",
+}
+
+# Word-level fallback for journals that are not in any table ('' drops the word)
+WORD_REPLACEMENTS = {
+    'journal': 'J.', 'review': 'Rev.', 'reviews': 'Rev.',
+    'physical': 'Phys.', 'physics': 'Phys.', 'applied': 'Appl.',
+    'letters': 'Lett.', 'optics': 'Opt.', 'optical': 'Opt.',
+    'society': 'Soc.', 'america': 'Am.', 'american': 'Am.',
+    'international': 'Int.', 'communications': 'Commun.',
+    'nature': 'Nat.', 'science': 'Sci.', 'engineering': 'Eng.',
+    'technology': 'Technol.', 'proceedings': 'Proc.',
+    'transactions': 'Trans.', 'national': 'Natl.',
+    'academy': 'Acad.', 'institute': 'Inst.', 'materials': 'Mater.',
+    'advanced': 'Adv.', 'advances': 'Adv.', 'quantum': 'Quantum',
+    'photonics': 'Photonics', 'chemistry': 'Chem.', 'chemical': 'Chem.',
+    'research': 'Res.', 'reports': 'Rep.', 'electronics': 'Electron.',
+    'biomedical': 'Biomed.', 'spectroscopy': 'Spectrosc.',
+    'measurement': 'Meas.', 'instruments': 'Instrum.', 'european': 'Eur.',
+    'of': '', 'the': '', 'and': '',
+}
+
+# Results kept by abbreviate_journal
+ABBREVIATION_CACHE_ENTRIES = 8192
+
+# JabRef's journal abbreviation lists (CC0), from https://github.com/JabRef/abbrv.jabref.org
+JABREF_TABLE_URL = 'https://raw.githubusercontent.com/JabRef/abbrv.jabref.org/main/journals/journal_abbreviations_{}.csv'
+DEFAULT_JABREF_TABLES = ['general', 'geology_physics', 'acs', 'ieee', 'lifescience', 'mathematics', 'webofscience-dots']
+
+
+def _normalize(journal_name):
+    return ' '.join(journal_name.replace('{', '').replace('}', '').split()).lower()
+
+
+def load_abbreviation_table(path):
+    """
+    Read a "full name;abbreviation" table (JabRef's journal_abbreviations_*.csv files;
+    ',' also works as the separator). Returns {normalized full name: abbreviation}.
+    """
+    table = {}
+    with open(path, 'r', encoding='utf-8-sig', newline='') as file:
+        first_line = file.readline()
+        delimiter = ';' if ';' in first_line else ','
+        file.seek(0)
+        for row in csv.reader(file, delimiter=delimiter):
+            if len(row) < 2 or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            table.setdefault(_normalize(row[0]), row[1].strip())
+    return table
+
+
+class JournalAbbreviator:
+    """
+    Exact lookup of the full name in a hash table, falling back to one combined
+    regex that abbreviates every known word in a single pass.
+    """
+
+    def __init__(self, exact_matches, word_replacements):
+        self.exact = exact_matches
+        self.words = word_replacements
+        alternation = '|'.join(sorted(map(re.escape, word_replacements), key=len, reverse=True))
+        # '&' between two words (e.g. "A&B") is dropped like 'and'
+        self.word_pattern = re.compile(rf'\b(?:{alternation})\b|\b&\b', re.IGNORECASE)
+
+    def abbreviate(self, journal_name):
+        abbreviation = self.exact.get(_normalize(journal_name))
+        if abbreviation is not None:
+            return abbreviation
+        abbr_name = self.word_pattern.sub(lambda m: self.words.get(m.group(0).lower(), ''), journal_name)
+        return re.sub(r'\s+', ' ', abbr_name).strip()
+
+
+_abbreviator = None
+
+
+def table_paths(directory=None):
+    """
+    The journal_abbreviations*.csv tables in `directory` (default: next to the scripts).
+    """
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    return sorted(glob.glob(os.path.join(directory, 'journal_abbreviations*.csv')))
+
+
+def build_abbreviator(paths):
+    """
+    A JournalAbbreviator over EXACT_MATCHES and the tables at `paths` (built-in entries
+    win, then the first table that has the name).
+    """
+    exact = {}
+    for path in paths:
+        try:
+            table = load_abbreviation_table(path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"Ignoring journal abbreviation table {path}: {e}")
+            continue
+        for name, abbreviation in table.items():
+            exact.setdefault(name, abbreviation)
+    exact.update({_normalize(name): abbreviation for name, abbreviation in EXACT_MATCHES.items()})
+    return JournalAbbreviator(exact, WORD_REPLACEMENTS)
+
+
+def get_abbreviator():
+    """
+    The shared JournalAbbreviator, built once on first use from the tables next to the scripts.
+    """
+    global _abbreviator
+    if _abbreviator is None:
+        _abbreviator = build_abbreviator(table_paths())
+    return _abbreviator
+
+
+def reset_abbreviator(abbreviator=None):
+    """
+    Replace the shared JournalAbbreviator, or with None rebuild it from the tables on next use.
+    """
+    global _abbreviator
+    _abbreviator = abbreviator
+    abbreviate_journal.cache_clear()
+
+
+def download_abbreviation_tables(names=DEFAULT_JABREF_TABLES, directory=None):
+    """
+    Download JabRef's lists `names` as journal_abbreviations_<name>.csv into `directory`
+    (default: next to the scripts). Returns {name: entries}; a list that can't be
+    downloaded is reported and skipped, keeping any earlier copy.
+    """
+    # Imported here: only needed for this one-off step
+    import urllib.request
+
+    directory = directory or os.path.dirname(os.path.abspath(__file__))
+    counts = {}
+    for name in names:
+        path = os.path.join(directory, f'journal_abbreviations_{name}.csv')
+        tmp_path = path + '.tmp'
+        try:
+            with urllib.request.urlopen(JABREF_TABLE_URL.format(name), timeout=60) as response:
+                with open(tmp_path, 'wb') as file:
+                    shutil.copyfileobj(response, file)
+            counts[name] = len(load_abbreviation_table(tmp_path))
+            os.replace(tmp_path, path)
+        except (OSError, UnicodeDecodeError, csv.Error) as e:
+            print(f"Could not download the '{name}' abbreviation list: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    reset_abbreviator()
+    return counts
+
+
+@lru_cache(maxsize=ABBREVIATION_CACHE_ENTRIES)
+def abbreviate_journal(journal_name):
+    if not journal_name:
+        return ""
+    return get_abbreviator().abbreviate(journal_name)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Manage the journal abbreviation tables used in formatted references.")
+    parser.add_argument('--download', nargs='*', metavar='LIST',
+                        help=f"Download JabRef's abbreviation lists (default: {' '.join(DEFAULT_JABREF_TABLES)})")
+    args = parser.parse_args()
+
+    if args.download is not None:
+        for name, entries in download_abbreviation_tables(args.download or DEFAULT_JABREF_TABLES).items():
+            print(f"journal_abbreviations_{name}.csv: {entries} journals")
+    entries = len(get_abbreviator().exact)
+    print(f"{entries} journals in {len(table_paths())} table(s) and the built-in list.")
+
+
+if __name__ == "__main__":
+    main()
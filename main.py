@@ -2,11 +2,27 @@
 import sys
 import tkinter as tk
 
-from pdf_search_app import PDFSearchApp
-
 sys.stdout.reconfigure(encoding='utf-8')
 
-if __name__ == "__main__":
+
+def create_window():
+    """
+    Create the main window and put it on screen right away, before the application
+    (pandas and the rest) is imported.
+    """
     root = tk.Tk()
-    app = PDFSearchApp(root)
+    root.title("Sergeley_3.5")
+    root.geometry("1150x800")
+    root.update()
+    return root
+
+
+def create_app(root):
+    from pdf_search_app import PDFSearchApp
+    return PDFSearchApp(root)
+
+
+if __name__ == "__main__":
+    root = create_window()
+    app = create_app(root)
     root.mainloop()
@@ -1,23 +1,28 @@
 import os
 import tkinter as tk
-from tkinter import END, messagebox, Button, Toplevel, Text, Frame, Label, Canvas, Scrollbar, Listbox, filedialog, Radiobutton
+from tkinter import END, messagebox, Button, Toplevel, Text, Frame, Label, Listbox, filedialog, Radiobutton
 from tkinter import font as tkfont
 import pandas as pd
-#import threading
 import concurrent.futures
+import queue
+import threading
 import time
-import re
 import subprocess
 import shutil
-from dateutil.parser import parse
-from fuzzywuzzy import fuzz
-from pyperclip import copy
-import webbrowser
 
-from utils import load_database, load_default_directory, parse_bibtex_field, extract_doi, generate_safe_filename_from_directory, show_duplicates_dialog, parse_doi_from_bibtex, bibtex_to_reference_aps, bibtex_to_reference_lc
+from utils import load_default_directory, load_settings, set_bibtex_metadata, generate_safe_filename_from_directory
+
+from engine import Library
+from confirm_dialogs import confirm_batch_extraction, show_duplicates_dialog
+from doi_extraction import extract_dois_parallel
+from results_view import ResultsView
+from search_query import parse_query, refines, sort_results
+from reference_export import REFERENCE_STYLES, export_references, format_reference
+
+# Search-as-you-type: wait for this pause in typing before searching
+LIVE_SEARCH_DELAY_MS = 250
+LIVE_SEARCH_POLL_MS = 20
 
-from database_utils import check_database_validity, update_last_used_time, find_duplicates
-from confirm_dialogs import confirm_extraction
 
 class PDFSearchApp:
     def __init__(self, root):
@@ -25,9 +30,23 @@ class PDFSearchApp:
         self.root.title("Sergeley_3.5")
         self.root.geometry("1150x800")
 
-        self.df = pd.DataFrame()
+        # The database and its indexes (see engine.py)
+        self.library = Library()
         self.results = pd.DataFrame()
-        self.csv_file = None
+
+        # Search-as-you-type state (see on_keywords_changed)
+        self.search_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.search_generation = 0
+        self.live_search_job = None
+        self.live_search_future = None
+        self.last_live_search = None
+
+        # Watch mode state (see start_watch)
+        self.watcher = None
+        self.watch_events = queue.Queue()
+        self.watch_pending_dirs = set()
+        self.watch_update_running = False
+        self.doi_extraction_running = False
 
         self.custom_font = tkfont.Font(family="Helvetica", size=11)
         self.title_font = tkfont.Font(family="Helvetica", size=11, weight="bold")
@@ -46,12 +65,11 @@ class PDFSearchApp:
         self.entry_directory.pack()
         self.entry_directory.insert(0, default_directory if default_directory else '')
 
-        # Initialize csv_file based on default_directory
+        # OPTIMIZATION: the database of the default directory is loaded in the background
+        # once the window is on screen (see load_library)
+        self.library_loading = bool(default_directory)
         if default_directory:
-            self.csv_file = generate_safe_filename_from_directory(default_directory)
-            self.df = load_database(self.csv_file)
-        else:
-            self.df = pd.DataFrame()
+            self.root.after_idle(self.load_library, default_directory)
 
         update_button = tk.Button(
             dir_update_frame,
@@ -61,6 +79,15 @@ class PDFSearchApp:
         )
         update_button.pack()
 
+        self.watch_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            dir_update_frame,
+            text="Watch folder for changes",
+            variable=self.watch_var,
+            command=self.toggle_watch,
+            font=self.custom_font
+        ).pack()
+
         search_frame = Frame(root)
         search_frame.pack(pady=10)
 
@@ -92,9 +119,18 @@ class PDFSearchApp:
         )
         very_recent_button.pack(side=tk.LEFT, padx=5)
 
+        export_button = tk.Button(
+            button_frame,
+            text="Export References",
+            command=self.open_export_window,
+            font=self.custom_font
+        )
+        export_button.pack(side=tk.LEFT, padx=5)
+
         tk.Label(search_frame, text="Enter search keywords:", font=self.custom_font).pack()
         self.entry_keywords = tk.Entry(search_frame, font=self.custom_font)
         self.entry_keywords.pack()
+        self.entry_keywords.bind('<KeyRelease>', self.on_keywords_changed)
 
         tk.Label(search_frame, text="Enter similarity threshold (0-100):", font=self.custom_font).pack()
         self.entry_threshold = tk.Entry(search_frame, font=self.custom_font)
@@ -102,6 +138,14 @@ class PDFSearchApp:
         if not self.entry_threshold.get():
             self.entry_threshold.insert(0, "100")
 
+        self.fulltext_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            search_frame,
+            text="Search PDF contents",
+            variable=self.fulltext_var,
+            font=self.custom_font
+        ).pack()
+
         search_button = tk.Button(
             search_frame,
             text="Search",
@@ -115,30 +159,61 @@ class PDFSearchApp:
         self.results_container = Frame(root)
         self.results_container.pack(fill=tk.BOTH, expand=True)
 
-        self.canvas = Canvas(self.results_container)
-        self.scrollbar = Scrollbar(self.results_container, orient="vertical", command=self.canvas.yview)
-        self.scrollable_frame = Frame(self.canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(
-                scrollregion=self.canvas.bbox("all")
-            )
+        self.results_view = ResultsView(
+            self.results_container,
+            title_font=self.title_font,
+            path_font=self.title_path,
+            button_font=self.custom_font,
+            actions=[
+                ("Open PDF", lambda i: self.open_pdf(self.results.iloc[i]['Path'])),
+                ("Move Paper", self.prompt_move_paper),
+                ("Show in Folder", self.show_file_in_explorer),
+                ("Copy BibTeX", self.copy_bibtex),
+                ("Edit BibTeX", self.open_bibtex_window),
+                ("Copy Reference", self.copy_reference),
+                ("Edit Comments", self.open_comments_window),
+            ]
         )
-
-        self.canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        self.canvas.configure(yscrollcommand=self.scrollbar.set)
-
-        self.canvas.pack(side="left", fill="both", expand=True)
-        self.scrollbar.pack(side="right", fill="y")
+        self.canvas = self.results_view.canvas
 
         self.canvas.bind_all("<MouseWheel>", self._on_mouse_wheel)
         self.canvas.bind_all("<Button-4>", self._on_mouse_wheel)
         self.canvas.bind_all("<Button-5>", self._on_mouse_wheel)
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def on_close(self):
+        self.stop_watch()
+        self.library.close()
+        self.search_executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def load_library(self, directory):
+        # Its own thread and callback, not the shared background task slot: a task started
+        # while this runs can't leave library_loading set
+        self.show_running_message()
+        self.run_in_background(self.library.open, directory, on_done=self.handle_library_loaded)
+
+    def handle_library_loaded(self, result, error):
+        self.library_loading = False
+        self.hide_running_message()
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to load the database: {error}")
+
+    def library_busy(self):
+        """
+        True (after telling the user) while the database is still being loaded.
+        """
+        if self.library_loading:
+            messagebox.showinfo("Busy", "The database is still loading, please try again in a moment.")
+        return self.library_loading
+
     def show_tags(self):
-        tags = self.extract_tags()
-        if not tags:
+        if self.library_busy():
+            return
+        # OPTIMIZATION: tags and their counts come from the tag index, no comment is read here
+        tag_counts = self.library.tag_index.tag_counts()
+        if not tag_counts:
             messagebox.showinfo("No Tags", "No tags found in the database.")
             return
 
@@ -150,39 +225,22 @@ class PDFSearchApp:
         # Create a Listbox to show tags
         listbox = Listbox(tags_window, font=self.custom_font)
 
-        for tag in tags:
-            listbox.insert(END, tag)
+        tags = []
+        for tag, count in tag_counts:
+            tags.append(tag)
+            listbox.insert(END, f"{tag} ({count})")
 
         listbox.pack(fill=tk.BOTH, expand=True)
 
         # Bind double-click event to the listbox items
-        listbox.bind('<Double-1>', lambda event: self.show_papers_with_tag(event, listbox))
+        listbox.bind('<Double-1>', lambda event: self.show_papers_with_tag(event, listbox, tags))
 
-    def extract_tags(self):
-        """
-        Extract tags from the 'Comments' column of the DataFrame.
-        Tags are assumed to be enclosed in curly braces {tag}.
-        """
-        if 'Comments' not in self.df.columns:
-            return[]
-            
-        # OPTIMIZATION: Vectorized regex extraction
-        # Extracts all matches into lists, drops NaNs, and flattens the lists
-        extracted_lists = self.df['Comments'].dropna().str.findall(r'\{(.*?)\}')
-        
-        # Flatten the list of lists and get unique values
-        tags = {tag for sublist in extracted_lists for tag in sublist}
-        
-        return sorted(list(tags))
-
-    def show_papers_with_tag(self, event, listbox):
+    def show_papers_with_tag(self, event, listbox, tags):
         selection = listbox.curselection()
         if selection:
-            index = selection[0]
-            tag = listbox.get(index)
+            tag = tags[selection[0]]
             # Filter the dataframe to show papers with the selected tag
-            pattern = r'\{' + re.escape(tag) + r'\}'
-            self.results = self.df[self.df['Comments'].str.contains(pattern, na=False, flags=re.IGNORECASE)].copy()
+            self.results = self.library.rows_with_paths(self.library.tag_index.paths_with_tag(tag))
             if self.results.empty:
                 messagebox.showinfo("No Results", f"No papers found with tag '{tag}'.")
             else:
@@ -194,45 +252,18 @@ class PDFSearchApp:
         elif event.num == 4 or event.delta > 0:
             self.canvas.yview_scroll(-1, "units")
 
-    def fuzzy_search_database(self, df, keywords, threshold=70):
-        keywords = [keyword.lower() for keyword in keywords]
-        combined_keywords = ' '.join(keywords)
-        columns_to_search = ['Path', 'Name', 'BibTeX', 'Comments']
-        
-        # Only use columns that actually exist in the dataframe
-        valid_cols =[col for col in columns_to_search if col in df.columns]
-
-        # OPTIMIZATION 1: Vectorized string concatenation (Extremely fast)
-        # Fills NaNs with empty strings, converts to string, joins with space, and makes lowercase
-        combined_text = df[valid_cols].fillna('').astype(str).agg(' '.join, axis=1).str.lower()
-
-        # OPTIMIZATION 2: Apply the fuzzy logic to the 1D Series rather than the 2D DataFrame
-        def compute_match(text):
-            # Quick exact substring check first to save CPU cycles on fuzzy math
-            if all(kw in text for kw in keywords):
-                return True
-                
-            individual_scores = [fuzz.partial_ratio(kw, text) for kw in keywords]
-            if all(score >= threshold for score in individual_scores):
-                return True
-                
-            combined_score = fuzz.token_set_ratio(combined_keywords, text)
-            return combined_score >= threshold
-
-        mask = combined_text.apply(compute_match)
-        return df[mask].reset_index(drop=True)
-
     def open_pdf(self, file_path):
         if os.path.exists(file_path):
             os.startfile(file_path)
             # Update 'Last Used Time'
-            update_last_used_time(self.df, file_path, self.csv_file)
+            self.library.mark_opened(file_path)
         else:
             messagebox.showerror("Error", f"File not found: {file_path}")
 
     def copy_bibtex(self, index):
         bib_info = self.results.iloc[index]['BibTeX']
         if pd.notna(bib_info):
+            from pyperclip import copy  # only needed once something is copied
             copy(bib_info)
         else:
             messagebox.showerror("Error", "BibTeX info not available for this entry.")
@@ -243,8 +274,7 @@ class PDFSearchApp:
         def save_comments():
             new_comments = text_comments.get("1.0", END).strip()
             self.results.at[index, 'Comments'] = new_comments
-            self.df.loc[self.df['Path'] == self.results.iloc[index]['Path'], 'Comments'] = new_comments
-            self.save_to_csv()
+            self.library.set_comments(self.results.iloc[index]['Path'], new_comments)
             messagebox.showinfo("Success", "Comments updated.")
             comment_window.destroy()
 
@@ -264,8 +294,8 @@ class PDFSearchApp:
         def save_bibtex():
             new_bibtex = text_bibtex.get("1.0", END).strip()
             self.results.at[index, 'BibTeX'] = new_bibtex
-            self.df.loc[self.df['Path'] == self.results.iloc[index]['Path'], 'BibTeX'] = new_bibtex
-            self.save_to_csv()
+            set_bibtex_metadata(self.results, [index])
+            self.library.set_bibtex(self.results.iloc[index]['Path'], new_bibtex)
             messagebox.showinfo("Success", "BibTeX information updated.")
             bibtex_window.destroy()
 
@@ -279,34 +309,115 @@ class PDFSearchApp:
         save_button = Button(bibtex_window, text="Save", command=save_bibtex, font=self.custom_font)
         save_button.pack()
 
-    def save_to_csv(self):
-        if self.csv_file:
-            # Construct the full path to the CSV file
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            csv_path = os.path.join(script_dir, self.csv_file)
-            self.df.to_csv(csv_path, index=False, encoding='utf-8')
-        else:
-            # Handle the case where csv_file is not set
-            pass
-
-
     def search(self):
-        keywords = self.entry_keywords.get().split()
+        if self.library_busy():
+            return
         threshold = int(self.entry_threshold.get())
+        try:
+            query = parse_query(self.entry_keywords.get())
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
 
-        if not keywords:
+        if query.is_empty():
             messagebox.showerror("Error", "Please enter search keywords.")
             return
 
-        # Run the search in background
-        self.run_task_in_background(self.perform_search, keywords, threshold, task_name='search')
+        # An explicit search supersedes any pending or running live search
+        self.cancel_live_search()
+
+        # Run the search in background; Tk variables are only read on this thread
+        fulltext = self.fulltext_var.get()
+        self.run_task_in_background(self.perform_search, query, threshold, fulltext, task_name='search')
+
+    def perform_search(self, query, threshold, fulltext):
+        self.results = self.library.search(query, threshold, fulltext=fulltext).copy()
+
+    def on_keywords_changed(self, event):
+        """
+        Debounce keystrokes in the keywords entry and start a live search once typing pauses.
+        """
+        if event.keysym in ('Return', 'KP_Enter', 'Left', 'Right', 'Up', 'Down', 'Home', 'End',
+                            'Shift_L', 'Shift_R', 'Control_L', 'Control_R', 'Alt_L', 'Alt_R'):
+            return
+        if self.live_search_job is not None:
+            self.root.after_cancel(self.live_search_job)
+        self.live_search_job = self.root.after(LIVE_SEARCH_DELAY_MS, self.live_search)
+
+    def cancel_live_search(self):
+        """
+        Drop the pending live search and make any in-flight one stale.
+        """
+        if self.live_search_job is not None:
+            self.root.after_cancel(self.live_search_job)
+            self.live_search_job = None
+        if self.live_search_future is not None:
+            self.live_search_future.cancel()
+            self.live_search_future = None
+        self.search_generation += 1
+
+    def live_search(self):
+        self.live_search_job = None
+        query = self.entry_keywords.get()
+        try:
+            threshold = int(self.entry_threshold.get())
+            parsed_query = parse_query(query)
+        except ValueError:
+            return
+        if parsed_query.is_empty() or self.library_loading or self.library.df.empty:
+            return
+
+        self.cancel_live_search()
+        generation = self.search_generation
+
+        # At threshold 100, a query that only extends the previous one (see refines)
+        # matches a subset of its rows, so only those are scored again.
+        previous = self.last_live_search
+        fulltext = self.fulltext_var.get()
+        refine = (
+            previous is not None
+            and not fulltext
+            and not previous['fulltext']
+            and threshold >= 100
+            and previous['threshold'] == threshold
+            and previous['corpus_version'] == self.library.search_corpus.version
+            and refines(previous['query'], query)
+        )
+        if refine:
+            future = self.search_executor.submit(
+                self.library.refine_search, previous['matches'], parsed_query.keywords, threshold
+            )
+        else:
+            future = self.search_executor.submit(self.library.search, parsed_query, threshold, fulltext)
+        self.live_search_future = future
+        corpus_version = self.library.search_corpus.version
+
+        def check_future():
+            if generation != self.search_generation:
+                return  # A newer search has started, discard this one
+            if not future.done():
+                self.root.after(LIVE_SEARCH_POLL_MS, check_future)
+                return
+            self.live_search_future = None
+            try:
+                matches = future.result()
+            except Exception as e:
+                print(f"Live search failed: {e}")
+                return
+            self.last_live_search = {
+                'query': query,
+                'threshold': threshold,
+                'fulltext': fulltext,
+                'corpus_version': corpus_version,
+                'matches': matches,
+            }
+            self.results = matches.copy()
+            self.display_results(notify=False)
 
-    def perform_search(self, keywords, threshold):
-        self.results = self.fuzzy_search_database(self.df, keywords, threshold).copy()
+        check_future()
         
     def copy_reference(self, index):
-        bibtex_str = self.results.loc[index, 'BibTeX']
-        reference = bibtex_to_reference_lc(bibtex_str)
+        reference = format_reference(self.results.loc[index], 'lc')
 
         if not reference:
             messagebox.showwarning("Copy Reference", "No reference data available.")
@@ -316,190 +427,76 @@ class PDFSearchApp:
         self.root.clipboard_append(reference)
         self.root.update()
 
-    def display_results(self):
+    def open_export_window(self):
+        """
+        Export the references of all current results to a file or the clipboard.
+        """
         if self.results.empty:
-            # Clear existing widgets first
-            for widget in self.scrollable_frame.winfo_children():
-                widget.destroy()
-            messagebox.showinfo("No Results", "No matching results found.")
+            messagebox.showinfo("Export References", "There are no results to export.")
             return
 
-        # 1. Extract and sort by year FIRST (before capping)
-        # FAST SORTING: Just use the dedicated 'Year' column!
-        self.results['Year'] = pd.to_numeric(self.results['Year'], errors='coerce')
-        self.results = (
-            self.results
-            .sort_values(by='Year', ascending=False, na_position='last')
-            .reset_index(drop=True)
-        )
-
-        # 2. NOW cap the results
-        max_results = 100
-        total_results = len(self.results)
-
-        if total_results > max_results:
-            messagebox.showinfo(
-                "Results Limited",
-                f"The total number of results is {total_results}, "
-                f"but only the top {max_results} most recent results are displayed."
+        export_window = Toplevel(self.root)
+        export_window.title("Export References")
+        Label(
+            export_window, text=f"Export {len(self.results)} results as:", font=self.custom_font
+        ).pack(anchor="w", padx=10, pady=(10, 0))
+
+        style_var = tk.StringVar(value='lc')
+        for style, (label, _) in REFERENCE_STYLES.items():
+            Radiobutton(
+                export_window, text=label, variable=style_var, value=style, font=self.custom_font
+            ).pack(anchor="w", padx=20)
+
+        def report(exported, skipped, target):
+            message = f"Exported {exported} references to {target}."
+            if skipped:
+                message += f"\n{skipped} results without BibTeX were skipped."
+            messagebox.showinfo("Export References", message)
+            export_window.destroy()
+
+        def save_to_file():
+            style = style_var.get()
+            extension = '.bib' if style == 'bib' else '.txt'
+            file_path = filedialog.asksaveasfilename(
+                parent=export_window,
+                defaultextension=extension,
+                filetypes=[("BibTeX", "*.bib")] if style == 'bib' else [("Text", "*.txt")],
+                title="Save References"
             )
-            self.results = self.results.head(max_results)
-
-        # 3. Clear UI
-        for widget in self.scrollable_frame.winfo_children():
-            widget.destroy()
-            
-        # ... (rest of your display_results code remains the same)
-
+            if not file_path:
+                return
+            with open(file_path, 'w', encoding='utf-8') as file:
+                exported, skipped = export_references(self.results, style, file.write)
+            report(exported, skipped, os.path.basename(file_path))
+
+        def copy_to_clipboard():
+            parts = []
+            exported, skipped = export_references(self.results, style_var.get(), parts.append)
+            self.root.clipboard_clear()
+            self.root.clipboard_append(''.join(parts))
+            self.root.update()
+            report(exported, skipped, "the clipboard")
+
+        buttons = Frame(export_window)
+        buttons.pack(pady=10)
+        Button(buttons, text="Save to File...", command=save_to_file, font=self.custom_font).pack(side="left", padx=5)
+        Button(buttons, text="Copy to Clipboard", command=copy_to_clipboard, font=self.custom_font).pack(side="left", padx=5)
+
+    def display_results(self, notify=True, keep_order=False):
         if self.results.empty:
-            messagebox.showinfo("No Results", "No matching results found.")
+            self.results_view.set_results(self.results)
+            if notify:
+                messagebox.showinfo("No Results", "No matching results found.")
             return
 
-        # Extract and sort by year
-        self.results['Year'] = self.results['BibTeX'].apply(
-            lambda bibtex: parse_bibtex_field(bibtex, 'year')
-        )
-        self.results['Year'] = pd.to_numeric(self.results['Year'], errors='coerce')
-        self.results = (
-            self.results
-            .sort_values(by='Year', ascending=False, na_position='last')
-            .reset_index(drop=True)
-        )
-
-        default_bg_color = self.root.cget("bg")
-
-        for index, row in self.results.iterrows():
-            # FAST RENDERING: Read directly from the columns instead of parsing BibTeX!
-            title = row.get('Title', '')
-            author = row.get('Author', '')
-            year = '-' if pd.isna(row['Year']) else int(row['Year'])
-
-            # ---> ADD THESE LINES BACK: We still need it for the DOI extraction below! <---
-            bibtex_str = row.get('BibTeX', '')
-            if not isinstance(bibtex_str, str):
-                bibtex_str = ''
-
-            if not title or pd.isna(title):
-                title = f"Path: {row['Path']}"
-            if pd.isna(author):
-                author = ""
-
-            # ===== Bibliography line =====
-            frame_biblio = Frame(self.scrollable_frame, pady=5)
-            frame_biblio.pack(fill=tk.X, padx=10)
-
-            bibliography_text = f"{year} - {title} - {author}"
-            text_width_px = self.title_font.measure(bibliography_text)
-            num_lines = (text_width_px // 1040) + 1
-            text_height = max(1, num_lines)
-
-            text_biblio = Text(
-                frame_biblio,
-                font=self.title_font,
-                fg="blue",
-                bg=default_bg_color,
-                wrap='word',
-                height=text_height,
-                borderwidth=0,
-                width=130
-            )
-            text_biblio.insert(tk.END, bibliography_text)
-            text_biblio.config(state=tk.DISABLED)
-            text_biblio.pack(anchor="w", fill='x', expand=True)
-
-            # ===== Path + DOI line =====
-            frame_path = Frame(self.scrollable_frame, pady=3)
-            frame_path.pack(fill=tk.X, padx=10)
-
-            doi = parse_doi_from_bibtex(bibtex_str)
-
-            text_path = Text(
-                frame_path,
-                font=self.title_path,
-                fg="black",
-                bg=default_bg_color,
-                wrap='word',
-                height=1,
-                borderwidth=0,
-                width=130
-            )
-
-            # Insert file path
-            text_path.insert(tk.END, row['Path'])
-
-            # Insert DOI (clickable)
-            if doi:
-                text_path.insert(tk.END, "    | DOI: ")
-                start = text_path.index(tk.INSERT)
-                text_path.insert(tk.END, doi)
-                end = text_path.index(tk.INSERT)
-
-                text_path.tag_add("doi", start, end)
-                text_path.tag_config("doi", foreground="blue", underline=True)
-                text_path.tag_bind(
-                    "doi",
-                    "<Button-1>",
-                    lambda e, d=doi: webbrowser.open(f"https://doi.org/{d}")
-                )
+        # FAST SORTING: Just use the dedicated 'Year' column!
+        # (The recent views are already ordered by date and keep that order.)
+        if not keep_order:
+            self.results = sort_results(self.results)
 
-            text_path.config(state=tk.DISABLED)
-            text_path.pack(anchor="w", fill='x', expand=True)
-
-            # ===== Buttons =====
-            frame_buttons = Frame(self.scrollable_frame)
-            frame_buttons.pack(fill=tk.X, padx=10, pady=2)
-
-            Button(
-                frame_buttons,
-                text="Open PDF",
-                command=lambda p=row['Path']: self.open_pdf(p),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-
-            Button(
-                frame_buttons,
-                text="Move Paper",
-                command=lambda i=index: self.prompt_move_paper(i),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-
-            Button(
-                frame_buttons,
-                text="Show in Folder",
-                command=lambda i=index: self.show_file_in_explorer(i),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-
-            Button(
-                frame_buttons,
-                text="Copy BibTeX",
-                command=lambda i=index: self.copy_bibtex(i),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-
-            Button(
-                frame_buttons,
-                text="Edit BibTeX",
-                command=lambda i=index: self.open_bibtex_window(i),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-            
-            Button(#new
-                frame_buttons,
-                text="Copy Reference",
-                command=lambda i=index: self.copy_reference(i),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-
-            Button(
-                frame_buttons,
-                text="Edit Comments",
-                command=lambda i=index: self.open_comments_window(i),
-                font=self.custom_font
-            ).pack(side="left", padx=(0, 10))
-
-
-    
+        # OPTIMIZATION: no cap on the number of results. The view only builds widgets
+        # for the rows on screen and fills them in as the list is scrolled.
+        self.results_view.set_results(self.results)
 
     def prompt_move_paper(self, index):
         # Get the current directory of the selected paper
@@ -556,13 +553,42 @@ class PDFSearchApp:
         self.show_running_message()
         check_future()
 
+    def run_in_background(self, task, *args, on_done):
+        """
+        Run task(*args) in a thread of its own and call on_done(result, error) on the Tk
+        thread once it finishes. Unlike run_task_in_background, this doesn't use the shared
+        background_task_* slot, so it can overlap with other tasks.
+        """
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        future = executor.submit(task, *args)
+        executor.shutdown(wait=False)
+
+        def check_future():
+            if not future.done():
+                self.root.after(100, check_future)
+                return
+            try:
+                result, error = future.result(), None
+            except Exception as e:
+                result, error = None, e
+            on_done(result, error)
+
+        check_future()
+
     def handle_background_task_result(self):
         if hasattr(self, 'background_task_exception'):
             messagebox.showerror("Error", f"Failed to perform task: {self.background_task_exception}")
             del self.background_task_exception
+            self.background_task_name = None
         else:
             if self.background_task_name == 'update_database':
                 result = self.background_task_result
+                if result['directory'] != self.library.directory:
+                    # Another directory was opened meanwhile: this scan no longer applies
+                    del self.background_task_result
+                    self.background_task_name = None
+                    return
+                self.library.apply_scan(result['diff'])
                 messages = result['messages']
                 files_requiring_confirmation = result['files_requiring_confirmation']
                 duplicates_to_confirm = result['duplicates_to_confirm']
@@ -581,15 +607,28 @@ class PDFSearchApp:
                     if os.path.exists(full_path):  # Only extract if it wasn't deleted!
                         valid_files_for_extraction.append(file_info)
 
-                # Process DOI extraction for the survivors
-                if valid_files_for_extraction:
-                    self.process_doi_extraction_confirmations(valid_files_for_extraction)
-
                 # --- STAGE 3: Deep DOI Duplicate Check ---
-                # Now that new DOIs are extracted, check one last time
-                final_duplicates = find_duplicates(self.df)
-                if final_duplicates:
-                    self.process_duplicate_confirmations(final_duplicates)
+                # Once new DOIs are extracted, check one last time
+                def check_final_duplicates():
+                    # Hashing can take a while: run it on a copy, off the Tk thread
+                    self.show_running_message()
+                    directory = self.library.directory
+                    self.run_in_background(
+                        self.library.find_duplicates, self.library.df.copy(),
+                        on_done=lambda duplicates, error: show_final_duplicates(directory, duplicates, error)
+                    )
+
+                def show_final_duplicates(directory, final_duplicates, error):
+                    self.hide_running_message()
+                    if directory != self.library.directory:
+                        return  # Another directory was opened meanwhile
+                    if error is not None:
+                        print(f"Error checking for duplicates: {error}")
+                    elif final_duplicates:
+                        self.process_duplicate_confirmations(final_duplicates)
+
+                # Process DOI extraction for the survivors (runs in the background)
+                self.process_doi_extraction_confirmations(valid_files_for_extraction, on_done=check_final_duplicates)
 
                 # Clean up
                 del self.background_task_result
@@ -607,6 +646,7 @@ class PDFSearchApp:
         Process duplicate files and let the user choose which files to delete.
         """
         self.show_running_message()
+        deleted_paths =[]
 
         for group in duplicates_list:
             # Include all duplicates in the group
@@ -619,112 +659,237 @@ class PDFSearchApp:
                 if os.path.exists(file_path):
                     try:
                         os.remove(file_path)
-                        # Remove from DataFrame
-                        self.df = self.df[self.df['Path'] != file_path]
+                        deleted_paths.append(file_path)
                     except OSError as e:
                         messagebox.showerror("Error", f"Failed to delete file: {file_path}\nError: {e}")
 
-        # Save the updated DataFrame
-        self.save_to_csv()
+        # Remove the deleted files from the database in one batch
+        self.library.forget(deleted_paths)
         self.hide_running_message()
 
 
 
 
 
-    def process_doi_extraction_confirmations(self, files):
+    def process_doi_extraction_confirmations(self, files, on_done=None):
+        """
+        Ask once which new PDFs to extract DOIs for, then extract them in a process pool
+        while the window stays responsive. Results are merged into self.library.df in batches
+        and saved once at the end, after which on_done() is called.
+        """
+        pdf_files =[file_info for file_info in files if file_info[2] == '.pdf']
+        selected = confirm_batch_extraction([file_info[1] for file_info in pdf_files]) if pdf_files else[]
+        paths =[pdf_files[i][0] for i in selected]
+        if not paths:
+            if on_done:
+                on_done()
+            return
+
+        settings = load_settings()
+        self.doi_extraction_running = True
+        results = queue.Queue()
+        worker = threading.Thread(
+            target=extract_dois_parallel,
+            args=(paths, lambda path, bib_info, error: results.put((path, bib_info, error))),
+            kwargs={
+                'max_workers': settings.get('doi_workers'),
+                'timeout': settings.get('doi_timeout'),
+                'cache': self.library.get_doi_cache(),
+            },
+            daemon=True
+        )
+        worker.start()
+
+        extracted_paths =[]
+        failures =[]
+        processed = [0]
+
+        def apply_batch():
+            batch =[]
+            while not results.empty():
+                batch.append(results.get_nowait())
+
+            if batch:
+                bib_by_path = {path: bib_info for path, bib_info, error in batch if bib_info is not None}
+                # Update the DataFrame with BibTeX AND the columns materialized from it
+                self.library.apply_bibtex(bib_by_path)
+                extracted_paths.extend(bib_by_path)
+                failures.extend(f"{os.path.basename(path)}: {error}" for path, _, error in batch if error)
+                processed[0] += len(batch)
+                self.running_label.config(text=f"Extracting DOIs... {processed[0]}/{len(paths)}")
+
+            if worker.is_alive() or not results.empty():
+                self.root.after(200, apply_batch)
+                return
+
+            # Save the updated DataFrame once for the whole batch
+            self.library.save_bibtex(extracted_paths)
+            self.doi_extraction_running = False
+            self.hide_running_message()
+            if failures:
+                messagebox.showwarning(
+                    "DOI Extraction",
+                    f"DOI extraction failed for {len(failures)} file(s):\n" + "\n".join(failures[:20])
+                )
+            if on_done:
+                on_done()
+
         self.show_running_message()
-        for file_info in files:
-            full_path, file_name, extension, size, modified_date = file_info
-            if extension == '.pdf':
-                should_extract = confirm_extraction(file_name)
-                if should_extract:
-                    bib_info = extract_doi(full_path)
-                    
-                    # Update the DataFrame with BibTeX AND the new dedicated columns
-                    self.df.loc[self.df['Path'] == full_path, 'BibTeX'] = bib_info
-                    self.df.loc[self.df['Path'] == full_path, 'Title'] = parse_bibtex_field(bib_info, 'title')
-                    self.df.loc[self.df['Path'] == full_path, 'Author'] = parse_bibtex_field(bib_info, 'author')
-                    self.df.loc[self.df['Path'] == full_path, 'Year'] = parse_bibtex_field(bib_info, 'year')
-                    
-        # Save the updated DataFrame
-        self.save_to_csv()
-        self.hide_running_message()
+        apply_batch()
 
     def run_update_database_task(self):
         directory_to_scan = self.entry_directory.get()
         if not directory_to_scan:
             messagebox.showerror("Error", "Please set a directory to scan first.")
             return
-        # Update csv_file and DataFrame based on the new directory
-        self.csv_file = generate_safe_filename_from_directory(directory_to_scan)
-        self.df = load_database(self.csv_file)
-        self.run_task_in_background(self.update_database, directory_to_scan, task_name='update_database')
+        if self.library_busy():
+            return
+        if self.watch_update_running:
+            messagebox.showinfo("Busy", "Changes in the watched folder are being applied, please try again in a moment.")
+            return
+        # Load the database of the (possibly new) directory
+        self.library.open(directory_to_scan)
+        if self.watcher is not None and self.watcher.directory != directory_to_scan:
+            self.stop_watch()
+            self.start_watch()
+        # The scan compares a copy; its result is applied on this thread once it's done
+        self.run_task_in_background(
+            self.update_database, self.library.directory, self.library.df.copy(), task_name='update_database'
+        )
 
-    def update_database(self, directory_to_scan):
+    def update_database(self, directory, df):
         try:
-            self.csv_file = generate_safe_filename_from_directory(directory_to_scan)
-            df, messages, files_requiring_confirmation, duplicates_to_confirm, error_message = check_database_validity(directory_to_scan, self.csv_file)
-            if error_message:
-                self.background_task_exception = error_message
-                return
-            self.df = df  # Update DataFrame
+            diff, duplicates_to_confirm, messages = self.library.scan_changes(df=df)
             self.background_task_result = {
+                'directory': directory,
+                'diff': diff,
                 'messages': messages,
-                'files_requiring_confirmation': files_requiring_confirmation,
+                'files_requiring_confirmation': diff.files_requiring_confirmation,
                 'duplicates_to_confirm': duplicates_to_confirm
             }
         except Exception as e:
             self.background_task_exception = str(e)
 
-    def show_recent_papers(self):
-        if 'Date Added' not in self.df.columns:
-            messagebox.showinfo("Error", "'Date Added' column not found in the database.")
+    def toggle_watch(self):
+        if self.watch_var.get():
+            self.start_watch()
+        else:
+            self.stop_watch()
+
+    def start_watch(self):
+        """
+        Watch the scan directory and apply file changes to the database as they happen,
+        instead of running "Update Database" by hand.
+        """
+        directory = self.entry_directory.get()
+        if not directory or not os.path.isdir(directory):
+            messagebox.showerror("Error", "Please set an existing directory to watch first.")
+            self.watch_var.set(False)
             return
+        if self.library_busy():
+            self.watch_var.set(False)
+            return
+        if self.library.csv_file != generate_safe_filename_from_directory(directory):
+            self.library.open(directory)
+
+        # Imported here: watchdog is only needed once watch mode is switched on
+        from directory_watcher import DirectoryWatcher
+        settings = load_settings()
+        self.watcher = DirectoryWatcher(
+            directory, self.watch_events.put,
+            settle_seconds=settings.get('watch_settle_seconds'),
+            poll_seconds=settings.get('watch_poll_seconds')
+        )
+        self.watcher.start()
+        self.watch_var.set(True)
+        print(f"Watching {directory} ({self.watcher.mode}).")
+        # Catch up with changes made while nobody was watching (unchanged folders come from the cache)
+        self.watch_pending_dirs.add(directory)
+        self.process_watch_events()
+
+    def stop_watch(self):
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+        self.watch_var.set(False)
+
+    def process_watch_events(self):
+        """
+        Collect the changed folders reported by the watcher and apply them as one update,
+        once no other update, DOI extraction or watch update is in progress.
+        """
+        if self.watcher is None:
+            return
+        while not self.watch_events.empty():
+            self.watch_pending_dirs |= self.watch_events.get_nowait()
 
-        today = pd.Timestamp.now()
-        one_week_ago = today - pd.Timedelta(days=7)
+        busy = (
+            self.watch_update_running or self.doi_extraction_running
+            or getattr(self, 'background_task_name', None) == 'update_database'
+        )
+        if self.watch_pending_dirs and not busy:
+            changed_dirs = self.watch_pending_dirs
+            self.watch_pending_dirs = set()
+            self.watch_update_running = True
+            # Its own thread and callback, not the shared background task slot: a search or
+            # file move started meanwhile must not take over the result
+            directory = self.library.directory
+            self.run_in_background(
+                self.library.scan_changes, changed_dirs, self.library.df.copy(),
+                on_done=lambda result, error: self.handle_watch_update_result(directory, changed_dirs, result, error)
+            )
+        self.root.after(500, self.process_watch_events)
 
-        # OPTIMIZATION: Vectorized date parsing
-        parsed_dates = pd.to_datetime(self.df['Date Added'], errors='coerce')
-        
-        mask = parsed_dates.notna() & (parsed_dates >= one_week_ago)
-        recent_papers = self.df[mask].copy()
-        
-        # Sort using the parsed dates
-        recent_papers['Parsed Date'] = parsed_dates[mask]
-        recent_papers = recent_papers.sort_values(by='Parsed Date', ascending=False).drop(columns=['Parsed Date'])
+    def handle_watch_update_result(self, directory, changed_dirs, result, error):
+        self.watch_update_running = False
+        if error is not None:
+            messagebox.showerror("Error", f"Failed to apply the changes in the watched folder: {error}")
+            return
+        if directory != self.library.directory:
+            return  # Another directory was opened meanwhile
+        diff, duplicates_to_confirm, _ = result
+        # Applied to the current database, so edits made during the scan are kept;
+        # only the rows that appeared or disappeared are re-indexed
+        self.library.apply_scan(diff, changed_dirs)
+        added_paths = diff.added_paths
+
+        # Existing duplicate groups were already offered on earlier updates
+        duplicates = [group for group in duplicates_to_confirm if group['Path'].isin(added_paths).any()]
+        if duplicates:
+            self.process_duplicate_confirmations(duplicates)
+
+        files = [file_info for file_info in diff.files_requiring_confirmation if os.path.exists(file_info[0])]
+        self.process_doi_extraction_confirmations(files)
+
+    def show_recent_papers(self):
+        if self.library_busy():
+            return
+        if 'Date Added' not in self.library.df.columns:
+            messagebox.showinfo("Error", "'Date Added' column not found in the database.")
+            return
 
+        days = load_settings().get('recent_added_days', 7)
+        recent_papers = self.library.recent_rows(self.library.added_index, days)
         if recent_papers.empty:
-            messagebox.showinfo("No Recent Papers", "No papers added in the last week.")
+            messagebox.showinfo("No Recent Papers", f"No papers added in the last {days} days.")
         else:
-            self.results = recent_papers.reset_index(drop=True)
-            self.display_results()
-
+            self.results = recent_papers
+            self.display_results(keep_order=True)
 
     def show_recently_opened_papers(self):
-        if 'Last Used Time' not in self.df.columns:
+        if self.library_busy():
+            return
+        if 'Last Used Time' not in self.library.df.columns:
             messagebox.showinfo("Error", "'Last Used Time' column not found in the database.")
             return
 
-        today = pd.Timestamp.now()
-        three_days_ago = today - pd.Timedelta(days=3)
-
-        # OPTIMIZATION: Vectorized date parsing
-        parsed_dates = pd.to_datetime(self.df['Last Used Time'], errors='coerce')
-        
-        mask = parsed_dates.notna() & (parsed_dates >= three_days_ago)
-        recent_papers = self.df[mask].copy()
-        
-        recent_papers['Parsed Last Used Time'] = parsed_dates[mask]
-        recent_papers = recent_papers.sort_values(by='Parsed Last Used Time', ascending=False).drop(columns=['Parsed Last Used Time'])
-
+        days = load_settings().get('recent_opened_days', 3)
+        recent_papers = self.library.recent_rows(self.library.opened_index, days)
         if recent_papers.empty:
-            messagebox.showinfo("No Recent Papers", "No papers opened in the last 3 days.")
+            messagebox.showinfo("No Recent Papers", f"No papers opened in the last {days} days.")
         else:
-            self.results = recent_papers.reset_index(drop=True)
-            self.display_results()
-
+            self.results = recent_papers
+            self.display_results(keep_order=True)
 
     def move_file(self, index, destination_folder):
         file_path = self.results.iloc[index]['Path']
@@ -754,13 +919,10 @@ class PDFSearchApp:
             # Move the file to the new location
             shutil.move(source_path, new_path)
 
-            # Update the DataFrame with the new path
-            self.df.loc[self.df['Path'] == file_path, 'Path'] = new_path
+            # Update the database (and its indexes) with the new path
+            self.library.rename(file_path, new_path)
             self.results.at[index, 'Path'] = new_path  # Update the path in the results DataFrame as well
 
-            # Save the changes to the CSV file
-            self.save_to_csv()
-
             messagebox.showinfo("Success", f"File moved to {destination_folder}.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to move file: {e}")
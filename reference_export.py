@@ -0,0 +1,60 @@
+from functools import lru_cache
+
+from bibtex_parser import BIBTEX_COLUMNS
+from utils import format_reference_aps, format_reference_lc
+
+# Export styles: label shown in the export window, and the formatter for one row
+REFERENCE_STYLES = {
+    'lc': ("Liquid Crystals (Vancouver)", format_reference_lc),
+    'aps': ("APS", format_reference_aps),
+    'bib': ("BibTeX (.bib)", lambda row: row['BibTeX'].strip()),
+}
+
+# Formatted entries kept between exports
+REFERENCE_CACHE_ENTRIES = 20000
+
+
+def _reference_columns(style):
+    # The .bib export copies the entry itself; the reference styles only need its columns
+    return ['BibTeX'] if style == 'bib' else BIBTEX_COLUMNS
+
+
+def format_reference(row, style):
+    """
+    Format the reference of one database row (a Series or a dict) in `style`.
+    """
+    columns = _reference_columns(style)
+    return _format_reference(tuple(row.get(column) for column in columns), style)
+
+
+@lru_cache(maxsize=REFERENCE_CACHE_ENTRIES)
+def _format_reference(values, style):
+    """
+    Memoized on the values of the columns the style uses, so an edited entry is
+    formatted again while every unchanged one comes from the cache.
+    """
+    values = ['' if not isinstance(value, str) else value for value in values]
+    if not any(value.strip() for value in values):
+        return ''
+    return REFERENCE_STYLES[style][1](dict(zip(_reference_columns(style), values)))
+
+
+def export_references(results, style, write):
+    """
+    Stream the references of all rows in `results` to write(text), in row order.
+
+    References are numbered ("1. ..."); BibTeX entries are separated by a blank line.
+    Rows without bibliographic data are skipped. Returns (exported, skipped).
+    """
+    exported = skipped = 0
+    for values in results[_reference_columns(style)].itertuples(index=False, name=None):
+        reference = _format_reference(values, style)
+        if not reference:
+            skipped += 1
+            continue
+        exported += 1
+        if style == 'bib':
+            write(f"{reference}\n\n")
+        else:
+            write(f"{exported}. {reference}\n")
+    return exported, skipped
@@ -0,0 +1,152 @@
+import math
+import tkinter as tk
+from tkinter import Frame, Text, Button, Canvas, Scrollbar
+
+import pandas as pd
+
+# Lines of "year - title - author" shown per result; longer entries are cut off
+BIBLIO_LINES = 2
+SCROLL_STEP_PX = 20
+
+
+class _ResultRow:
+    """
+    The widgets of one result. Rows are reused: fill() points them at another result.
+    """
+
+    def __init__(self, view):
+        self.view = view
+        self.index = None
+        self.doi = ''
+        default_bg_color = view.canvas.master.cget("bg")
+
+        self.frame = Frame(view.canvas)
+        self.window = view.canvas.create_window((0, 0), window=self.frame, anchor="nw")
+
+        # ===== Bibliography line =====
+        self.text_biblio = Text(
+            self.frame, font=view.title_font, fg="blue", bg=default_bg_color,
+            wrap='word', height=BIBLIO_LINES, borderwidth=0, width=130
+        )
+        self.text_biblio.pack(anchor="w", fill='x', expand=True, padx=10, pady=(5, 0))
+
+        # ===== Path + DOI line =====
+        self.text_path = Text(
+            self.frame, font=view.path_font, fg="black", bg=default_bg_color,
+            wrap='none', height=1, borderwidth=0, width=130
+        )
+        self.text_path.tag_config("doi", foreground="blue", underline=True)
+        self.text_path.tag_bind("doi", "<Button-1>", lambda e: self.open_doi())
+        self.text_path.pack(anchor="w", fill='x', expand=True, padx=10, pady=3)
+
+        # ===== Buttons =====
+        frame_buttons = Frame(self.frame)
+        frame_buttons.pack(fill=tk.X, padx=10, pady=2)
+        for text, command in view.actions:
+            Button(
+                frame_buttons, text=text, font=view.button_font,
+                command=lambda c=command: c(self.index) if self.index is not None else None
+            ).pack(side="left", padx=(0, 10))
+
+    def fill(self, index, row):
+        self.index = index
+        title = row.get('Title', '')
+        author = row.get('Author', '')
+        year = pd.to_numeric(row['Year'], errors='coerce')
+        year = '-' if pd.isna(year) else int(year)
+        if not isinstance(title, str) or not title:
+            title = f"Path: {row['Path']}"
+        if not isinstance(author, str):
+            author = ""
+
+        self._set_text(self.text_biblio, f"{year} - {title} - {author}")
+
+        doi = row.get('DOI', '')
+        self.doi = doi if isinstance(doi, str) else ''
+        self._set_text(self.text_path, row['Path'])
+        if self.doi:
+            self.text_path.config(state=tk.NORMAL)
+            self.text_path.insert(tk.END, "    | DOI: ")
+            self.text_path.insert(tk.END, self.doi, "doi")
+            self.text_path.config(state=tk.DISABLED)
+
+    def open_doi(self):
+        import webbrowser  # only needed once a DOI link is clicked
+        webbrowser.open(f"https://doi.org/{self.doi}")
+
+    @staticmethod
+    def _set_text(widget, text):
+        widget.config(state=tk.NORMAL)
+        widget.delete("1.0", tk.END)
+        widget.insert(tk.END, text)
+        widget.config(state=tk.DISABLED)
+
+
+class ResultsView:
+    """
+    Scrollable list of results that only has widgets for the rows in view.
+
+    All rows have the same height, so the scroll region can span every result while
+    a small pool of row widgets is moved to, and refilled with, whatever rows are
+    visible after each scroll or resize. The number of widgets depends on the window
+    height only, not on the number of results.
+
+    `actions` is a list of (button text, callback(index into the results)).
+    """
+
+    def __init__(self, parent, title_font, path_font, button_font, actions):
+        self.title_font = title_font
+        self.path_font = path_font
+        self.button_font = button_font
+        self.actions = actions
+        self.results = pd.DataFrame()
+        self.rows = []
+
+        self.canvas = Canvas(parent, yscrollincrement=SCROLL_STEP_PX)
+        self.scrollbar = Scrollbar(parent, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_scroll)
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.bind("<Configure>", lambda e: self._refresh())
+
+        # Measure the height of a row once; every row has the same layout
+        probe = _ResultRow(self)
+        self.canvas.update_idletasks()
+        self.row_height = max(1, probe.frame.winfo_reqheight())
+        self.canvas.itemconfigure(probe.window, state='hidden')
+        self.rows.append(probe)
+
+    def set_results(self, results):
+        """
+        Show `results` (a DataFrame in display order) from the top.
+        """
+        self.results = results
+        for row in self.rows:
+            row.index = None
+        self.canvas.configure(scrollregion=(0, 0, 0, len(results) * self.row_height))
+        self.canvas.yview_moveto(0)
+        self._refresh()
+
+    def _on_scroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._refresh()
+
+    def _refresh(self):
+        height = self.canvas.winfo_height()
+        width = self.canvas.winfo_width()
+        first_index = max(0, int(self.canvas.canvasy(0) // self.row_height))
+        visible = math.ceil(height / self.row_height) + 1
+
+        while len(self.rows) < visible:
+            self.rows.append(_ResultRow(self))
+
+        for offset, row in enumerate(self.rows):
+            index = first_index + offset
+            if offset >= visible or index >= len(self.results):
+                self.canvas.itemconfigure(row.window, state='hidden')
+                row.index = None
+                continue
+            if row.index != index:
+                row.fill(index, self.results.iloc[index])
+            self.canvas.coords(row.window, 0, index * self.row_height)
+            self.canvas.itemconfigure(row.window, state='normal', width=width, height=self.row_height)
@@ -0,0 +1,284 @@
+import os
+import pickle
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import utils as fuzz_utils
+
+INDEX_VERSION = 1
+GRAM_SIZE = 3
+
+SEARCH_COLUMNS = ['Path', 'Name', 'BibTeX', 'Comments']
+
+# Characters fuzzywuzzy deletes (force_ascii) before token_set_ratio splits a text into tokens
+_DELETED_CHARS = re.compile('[\x80-\xff]')
+
+# Rebuild from scratch once this share of the library changed since the last build
+REBUILD_FRACTION = 0.2
+
+
+def index_path_for(csv_file):
+    """
+    Path of the trigram index stored next to the given CSV database.
+    """
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    base_name = os.path.splitext(csv_file)[0]
+    return os.path.join(script_dir, f"{base_name}.trigrams.pkl")
+
+
+def _grams(text, q=GRAM_SIZE):
+    return [text[i:i + q] for i in range(len(text) - q + 1)]
+
+
+def _tokens(text):
+    # Same processing fuzz.token_set_ratio applies before splitting into tokens
+    return set(fuzz_utils.full_process(text, force_ascii=True).split())
+
+
+def build_search_text(df):
+    """
+    Lowercased text Library.fuzzy_search matches against, one string per row.
+    """
+    valid_cols = [col for col in SEARCH_COLUMNS if col in df.columns]
+    if df.empty or not valid_cols:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[valid_cols].fillna('').astype(str).agg(' '.join, axis=1).str.lower()
+
+
+def _hash_texts(texts):
+    return pd.util.hash_pandas_object(texts, index=False).to_numpy()
+
+
+class SearchCorpus:
+    """
+    Cached search text (and its hash) for every path in the database.
+
+    Built once when the database is loaded and then refreshed only for the rows
+    that are edited, so searches never rebuild the combined strings.
+    """
+
+    def __init__(self):
+        self.texts = {}
+        self.hashes = {}
+        # Paths whose text has characters in _DELETED_CHARS: deleting them joins the letters
+        # around them into tokens that aren't in the text itself (see Library.refine_search)
+        self.joining_paths = set()
+        # Bumped on every change so cached search results can tell they are stale
+        self.version = 0
+
+    def rebuild(self, df):
+        self.version += 1
+        self.texts = {}
+        self.hashes = {}
+        self.joining_paths = set()
+        self._store(df)
+
+    def update(self, df, paths):
+        """
+        Recompute the search text for the rows of `df` with the given paths.
+        """
+        self.version += 1
+        self._store(df[df['Path'].isin(paths)])
+
+    def discard(self, paths):
+        self.version += 1
+        for path in paths:
+            self.texts.pop(path, None)
+            self.hashes.pop(path, None)
+            self.joining_paths.discard(path)
+
+    def _store(self, rows):
+        if rows.empty:
+            return
+        texts = build_search_text(rows)
+        self.texts.update(zip(rows['Path'], texts))
+        self.hashes.update(zip(rows['Path'], _hash_texts(texts)))
+        for path, text in zip(rows['Path'], texts):
+            if _DELETED_CHARS.search(text):
+                self.joining_paths.add(path)
+            else:
+                self.joining_paths.discard(path)
+
+    def texts_for(self, df):
+        """
+        Search text aligned with `df`. Rows the corpus has not seen yet are added on the fly.
+        """
+        if df.empty:
+            return pd.Series('', index=df.index, dtype=object)
+        texts = df['Path'].map(self.texts)
+        missing = texts.isna()
+        if missing.any():
+            self._store(df[missing])
+            texts = df['Path'].map(self.texts)
+        return texts
+
+    def hashes_for(self, df):
+        return df['Path'].map(self.hashes).to_numpy(dtype=np.uint64)
+
+
+class TrigramIndex:
+    """
+    Character-trigram inverted index over the combined search text of a library.
+
+    The index only shortlists rows: every row that could reach the threshold in
+    Library.fuzzy_search is kept, so the scorer returns the same results while
+    running on a small fraction of the library.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.paths = pd.Index([])
+        self.hashes = np.zeros(0, dtype=np.uint64)
+        self.lengths = np.zeros(0, dtype=np.int64)
+        self.token_lengths = np.zeros(0, dtype=np.int64)
+        self.gram_postings = {}
+        self.token_postings = {}
+        # Position in the index of every row of the last synced DataFrame (-1 = not indexed)
+        self._row_positions = np.zeros(0, dtype=np.int64)
+
+    @classmethod
+    def load(cls, path):
+        index = cls(path)
+        if os.path.exists(path):
+            try:
+                with open(path, 'rb') as file:
+                    state = pickle.load(file)
+                if state.get('version') == INDEX_VERSION and state.get('gram_size') == GRAM_SIZE:
+                    index.paths = pd.Index(state['paths'])
+                    index.hashes = state['hashes']
+                    index.lengths = state['lengths']
+                    index.token_lengths = state['token_lengths']
+                    index.gram_postings = state['gram_postings']
+                    index.token_postings = state['token_postings']
+            except Exception as e:
+                print(f"Ignoring unreadable search index {path}: {e}")
+        return index
+
+    def save(self):
+        state = {
+            'version': INDEX_VERSION,
+            'gram_size': GRAM_SIZE,
+            'paths': self.paths.tolist(),
+            'hashes': self.hashes,
+            'lengths': self.lengths,
+            'token_lengths': self.token_lengths,
+            'gram_postings': self.gram_postings,
+            'token_postings': self.token_postings,
+        }
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            pickle.dump(state, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def build(self, paths, texts):
+        """
+        Index the given rows from scratch. `texts` is the lowercased combined search text.
+        """
+        gram_postings = {}
+        token_postings = {}
+        token_lengths = np.zeros(len(texts), dtype=np.int64)
+
+        for row, text in enumerate(texts):
+            for gram in set(_grams(text)):
+                gram_postings.setdefault(gram, []).append(row)
+            tokens = _tokens(text)
+            for token in tokens:
+                token_postings.setdefault(token, []).append(row)
+            token_lengths[row] = len(' '.join(tokens))
+
+        self.paths = pd.Index(list(paths))
+        self.hashes = _hash_texts(pd.Series(list(texts), dtype=object))
+        self.lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+        self.token_lengths = token_lengths
+        self.gram_postings = {gram: np.array(rows, dtype=np.uint32) for gram, rows in gram_postings.items()}
+        self.token_postings = {token: np.array(rows, dtype=np.uint32) for token, rows in token_postings.items()}
+
+    def sync(self, paths, texts, hashes=None):
+        """
+        Align the index with the current rows. Rows that are new or whose text changed
+        since the last build are never pruned; the index is rebuilt and saved once
+        too many of them pile up.
+        """
+        if hashes is None:
+            hashes = _hash_texts(texts)
+        positions = self.paths.get_indexer(paths) if self.paths.is_unique else np.full(len(paths), -1)
+        known = np.flatnonzero(positions >= 0)
+        changed = known[self.hashes[positions[known]] != hashes[known]]
+        positions[changed] = -1
+
+        stale = np.count_nonzero(positions < 0)
+        if stale and (len(self.paths) == 0 or stale > REBUILD_FRACTION * len(paths)):
+            self.build(paths, texts)
+            self.save()
+            positions = np.arange(len(paths))
+
+        self._row_positions = positions
+
+    def _keyword_candidates(self, keyword, min_ratio):
+        """
+        Rows where fuzz.partial_ratio(keyword, text) can reach `min_ratio`, or None
+        when the keyword is too short or the threshold too low to prune anything.
+
+        A window of the text scoring ratio r against a keyword of length L is at most
+        D = 2L(1 - r) insertions/deletions away from it, and each of those destroys at
+        most GRAM_SIZE of the keyword's L - GRAM_SIZE + 1 trigrams.
+        """
+        length = len(keyword)
+        max_distance = int(2 * length * (1 - min_ratio))
+        required = (length - GRAM_SIZE + 1) - GRAM_SIZE * max_distance
+        if required <= 0:
+            return None
+
+        counts = np.zeros(len(self.paths), dtype=np.int32)
+        for gram, multiplicity in Counter(_grams(keyword)).items():
+            rows = self.gram_postings.get(gram)
+            if rows is not None:
+                counts[rows] += multiplicity
+
+        # partial_ratio compares against the whole text when it is shorter than the keyword
+        return (counts >= required) | (self.lengths < length)
+
+    def _token_set_candidates(self, combined_keywords, min_ratio):
+        """
+        Rows where fuzz.token_set_ratio(combined_keywords, text) can reach `min_ratio`.
+
+        Without a shared token the score is the ratio of the two sorted token strings,
+        which cannot exceed 2 * min(a, b) / (a + b) for lengths a and b.
+        """
+        candidates = np.zeros(len(self.paths), dtype=bool)
+        keyword_tokens = _tokens(combined_keywords)
+        if not keyword_tokens:
+            return candidates
+
+        for token in keyword_tokens:
+            rows = self.token_postings.get(token)
+            if rows is not None:
+                candidates[rows] = True
+
+        a = len(' '.join(keyword_tokens))
+        b = self.token_lengths
+        candidates |= 2 * np.minimum(a, b) >= min_ratio * (a + b)
+        return candidates
+
+    def candidate_mask(self, keywords, threshold):
+        """
+        Boolean mask over the rows of the last `sync` call that may match the query.
+        """
+        positions = self._row_positions
+        if threshold <= 0:
+            return np.ones(len(positions), dtype=bool)
+
+        # Scores are rounded to integers, so a score of threshold - 0.5 still passes
+        min_ratio = (threshold - 0.5) / 100
+
+        partial = np.ones(len(self.paths), dtype=bool)
+        for keyword in keywords:
+            keyword_rows = self._keyword_candidates(keyword, min_ratio)
+            if keyword_rows is None:
+                return np.ones(len(positions), dtype=bool)
+            partial &= keyword_rows
+
+        indexed = partial | self._token_set_candidates(' '.join(keywords), min_ratio)
+        return (positions < 0) | indexed[np.where(positions >= 0, positions, 0)]
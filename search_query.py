@@ -0,0 +1,169 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Query syntax, e.g.  {optics} author:smith year:2015..2020 "liquid crystal" -review
+#   {tag}           papers with the tag (see tag_index.py)
+#   field:value     author:, title:, journal: (substring), doi: (exact), year:2015..2020
+#   "a phrase"      exact phrase anywhere in the path, name, BibTeX or comments
+#   -term           excludes papers matching any of the above (or a plain word)
+#   word            fuzzy keywords, scored by Library.fuzzy_search (engine.py)
+FIELD_COLUMNS = {'author': 'Author', 'title': 'Title', 'journal': 'Journal', 'doi': 'DOI', 'year': 'Year'}
+
+# Planner order: filters answered from an index or a single column run first
+FILTER_COST = {'tag': 0, 'doi': 1, 'year': 2, 'author': 3, 'title': 3, 'journal': 3, 'text': 4}
+
+_TOKEN = re.compile(r'(-?)(?:\{([^}]*)\}|([A-Za-z]+):(?:"([^"]*)"|(\S+))|"([^"]*)"|(\S+))')
+_YEAR_RANGE = re.compile(r'^(\d{1,4})?(?:(\.\.|-)(\d{1,4})?)?$')
+
+
+class SearchQuery:
+    """
+    A parsed query: fuzzy keywords, positive phrases, and filters as
+    (kind, value, negated) tuples.
+    """
+
+    def __init__(self, keywords=None, phrases=None, filters=None):
+        self.keywords = keywords or []
+        self.phrases = phrases or []
+        self.filters = filters or []
+
+    @property
+    def is_plain(self):
+        """
+        True for a query of plain keywords only, which behaves exactly like before.
+        """
+        return not self.phrases and not self.filters
+
+    def is_empty(self):
+        return not self.keywords and not self.phrases and not self.filters
+
+
+def _parse_year_range(value):
+    match = _YEAR_RANGE.match(value)
+    if not match or not (match.group(1) or match.group(3)):
+        raise ValueError(f"Invalid year '{value}', use e.g. year:2015, year:2015..2020 or year:..2020")
+    low = int(match.group(1)) if match.group(1) else None
+    high = int(match.group(3)) if match.group(3) else None
+    if not match.group(2):
+        high = low
+    return low, high
+
+
+def parse_query(text):
+    """
+    Parse the search box text into a SearchQuery. Raises ValueError for an invalid year.
+    """
+    query = SearchQuery()
+    for match in _TOKEN.finditer(text):
+        negated = bool(match.group(1))
+        tag, field, quoted, bare, phrase, word = match.group(2, 3, 4, 5, 6, 7)
+        if tag is not None:
+            if tag.strip():
+                query.filters.append(('tag', tag.strip(), negated))
+        elif field is not None and field.lower() in FIELD_COLUMNS:
+            field = field.lower()
+            value = quoted if quoted is not None else bare
+            if field == 'year':
+                query.filters.append(('year', _parse_year_range(value), negated))
+            elif value.strip():
+                query.filters.append((field, value.strip().lower(), negated))
+        elif field is not None or word is not None:
+            # An unknown field ("http://...") is an ordinary word
+            word = match.group(0)[1:] if negated else match.group(0)
+            if negated:
+                query.filters.append(('text', word.lower(), True))
+            elif word != '-':
+                query.keywords.append(word)
+        elif phrase is not None and phrase.strip():
+            if negated:
+                query.filters.append(('text', phrase.strip().lower(), True))
+            else:
+                query.phrases.append(phrase.strip())
+    return query
+
+
+def refines(previous_text, text):
+    """
+    True if the plain query `text` can only match rows that `previous_text` matched at
+    threshold 100, so a live search may rescore just those (see Library.refine_search).
+    That needs `text` to extend `previous_text` and every keyword to be ASCII letters and
+    digits: token_set_ratio splits on punctuation, so 'foo-bar' -> 'foo-barx' can match
+    rows 'foo-bar' did not.
+    """
+    if not text.startswith(previous_text):
+        return False
+    try:
+        queries = (parse_query(previous_text), parse_query(text))
+    except ValueError:
+        return False
+    return all(
+        query.is_plain and query.keywords
+        and all(keyword.isascii() and keyword.isalnum() for keyword in query.keywords)
+        for query in queries
+    )
+
+
+def _term_mask(rows, kind, value, tag_index, search_texts):
+    """
+    Which of `rows` satisfy one (non-negated) filter.
+    """
+    if kind == 'tag':
+        paths = tag_index.paths_with_tag(value)
+        return np.fromiter((path in paths for path in rows['Path'].tolist()), dtype=bool, count=len(rows))
+    if kind == 'year':
+        low, high = value
+        years = pd.to_numeric(rows['Year'], errors='coerce').to_numpy(dtype=float)
+        mask = ~np.isnan(years)
+        if low is not None:
+            mask &= years >= low
+        if high is not None:
+            mask &= years <= high
+        return mask
+    if kind == 'doi':
+        value = re.sub(r'^(https?://(dx\.)?doi\.org/|doi:)', '', value)
+        return (rows['DOI'].fillna('').astype(str).str.lower() == value).to_numpy(dtype=bool)
+    if kind == 'text':
+        return search_texts(rows).str.contains(value, regex=False).to_numpy(dtype=bool)
+    column = FIELD_COLUMNS[kind]
+    return rows[column].fillna('').astype(str).str.lower().str.contains(value, regex=False).to_numpy(dtype=bool)
+
+
+def filter_mask(df, query, tag_index, search_texts, phrases=True):
+    """
+    Boolean mask of the rows of `df` that pass every filter of `query`.
+
+    The planner runs the cheapest, most selective filters first (tag index, DOI,
+    year, single columns, then the combined search text), and each filter only
+    looks at the rows that survived the previous ones. `search_texts(rows)` returns
+    the lowercased search text of `rows` (SearchCorpus.texts_for). With
+    phrases=False, the query's phrases are left to the caller (full-text search).
+    """
+    terms = list(query.filters)
+    if phrases:
+        terms += [('text', phrase.lower(), False) for phrase in query.phrases]
+    terms.sort(key=lambda term: (term[2], FILTER_COST[term[0]]))
+
+    mask = np.ones(len(df), dtype=bool)
+    for kind, value, negated in terms:
+        positions = np.flatnonzero(mask)
+        if len(positions) == 0:
+            break
+        matched = _term_mask(df.iloc[positions], kind, value, tag_index, search_texts)
+        mask[positions] = ~matched if negated else matched
+    return mask
+
+
+def sort_results(results):
+    """
+    Order results for display: newest year first, entries without a year last.
+    """
+    return (
+        results
+        .sort_values(
+            by='Year', key=lambda years: pd.to_numeric(years, errors='coerce'),
+            ascending=False, na_position='last', kind='stable'
+        )
+        .reset_index(drop=True)
+    )
@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from fuzzywuzzy import fuzz
+from fuzzywuzzy import utils as fuzz_utils
+from fuzzywuzzy.string_processing import StringProcessor
+
+try:
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+except ImportError:  # rapidfuzz is optional, the reference scorer works without it
+    rf_process = None
+
+
+class ReferenceScorer:
+    """
+    Scores one row at a time with fuzzywuzzy. Slow, but it is the original
+    implementation and the definition of what a match is.
+    """
+    name = 'reference'
+
+    def match(self, texts, keywords, threshold):
+        combined_keywords = ' '.join(keywords)
+
+        def compute_match(text):
+            # Quick exact substring check first to save CPU cycles on fuzzy math
+            if all(kw in text for kw in keywords):
+                return True
+
+            individual_scores = [fuzz.partial_ratio(kw, text) for kw in keywords]
+            if all(score >= threshold for score in individual_scores):
+                return True
+
+            combined_score = fuzz.token_set_ratio(combined_keywords, text)
+            return combined_score >= threshold
+
+        return texts.apply(compute_match).to_numpy(dtype=bool)
+
+
+def _full_process(texts):
+    """
+    Vectorized equivalent of fuzzywuzzy's full_process(s, force_ascii=True),
+    the preprocessing token_set_ratio applies to both of its arguments.
+    """
+    return (
+        texts.str.translate(fuzz_utils.translation_table)
+        .str.replace(StringProcessor.regex, ' ', regex=True)
+        .str.lower()
+        .str.strip()
+    )
+
+
+class BatchScorer:
+    """
+    Same three stages as ReferenceScorer, but every stage scores all rows at once:
+    vectorized substring tests, then rapidfuzz's cdist matrix for partial_ratio
+    and token_set_ratio, which runs natively on all cores.
+
+    rapidfuzz finds the optimal alignment where fuzzywuzzy uses a heuristic, so its
+    scores are an upper bound. Rows below it are rejected outright; the few rows that
+    clear it are confirmed with the reference scorer, keeping both backends identical.
+    """
+    name = 'batch'
+
+    def __init__(self):
+        self.reference = ReferenceScorer()
+
+    def match(self, texts, keywords, threshold):
+        texts = pd.Series(texts, dtype=object)
+        matched = np.ones(len(texts), dtype=bool)
+        for kw in keywords:
+            matched &= texts.str.contains(kw, regex=False).to_numpy(dtype=bool)
+
+        remaining = np.flatnonzero(~matched)
+        if len(remaining) == 0:
+            return matched
+
+        # fuzzywuzzy rounds scores to integers before comparing them with the threshold
+        cutoff = threshold - 0.5
+
+        partial_scores = rf_process.cdist(
+            keywords, texts.iloc[remaining].tolist(), scorer=rf_fuzz.partial_ratio, workers=-1
+        )
+        possible = (partial_scores >= cutoff).all(axis=0)
+
+        unresolved = remaining[~possible]
+        processed_keywords = fuzz_utils.full_process(' '.join(keywords), force_ascii=True)
+        if len(unresolved) and processed_keywords:
+            token_scores = rf_process.cdist(
+                [processed_keywords], _full_process(texts.iloc[unresolved]).tolist(),
+                scorer=rf_fuzz.token_set_ratio, workers=-1
+            )
+            possible[~possible] = token_scores[0] >= cutoff
+
+        survivors = remaining[possible]
+        if len(survivors):
+            matched[survivors] = self.reference.match(texts.iloc[survivors], keywords, threshold)
+        return matched
+
+
+SCORERS = {scorer.name: scorer for scorer in (ReferenceScorer, BatchScorer)}
+
+
+def get_scorer(name=None):
+    """
+    Return a scorer instance by name. Defaults to the batch scorer when rapidfuzz is installed.
+    """
+    if name is None:
+        name = 'batch' if rf_process is not None else 'reference'
+    if name == 'batch' and rf_process is None:
+        print("rapidfuzz is not installed, falling back to the reference scorer.")
+        name = 'reference'
+    return SCORERS[name]()
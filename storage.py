@@ -0,0 +1,453 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import zlib
+from contextlib import closing
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401  (needed by pandas for Feather snapshots)
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+from bibtex_parser import BIBTEX_COLUMNS
+from utils import DATABASE_COLUMNS, DATE_FORMAT, load_database, load_settings, upgrade_metadata
+
+
+def _plain_value(value):
+    """
+    Convert a DataFrame cell to a plain Python value (None for missing) for SQLite or JSON.
+    """
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(DATE_FORMAT)
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _fsync_file(path):
+    with open(path, 'rb+') as file:
+        os.fsync(file.fileno())
+
+
+class CSVStorage:
+    """
+    The original storage engine: the whole library lives in file_database_*.csv.
+
+    Unless 'csv_journal' is disabled in the settings, row-level changes are appended
+    to a journal next to the CSV (file_database_*.journal) instead of rewriting the
+    file. load() replays the journal over the CSV, and once the journal grows past
+    'journal_compact_bytes' it is folded back into the CSV in the background.
+
+    Every journal record is one line prefixed with its CRC32, so a record torn by a
+    crash is detected and ignored on replay. All records are idempotent, which makes
+    replaying a journal over a CSV that already contains it harmless.
+
+    When pyarrow is installed, every write of the CSV also writes a columnar Feather
+    snapshot (file_database_*.feather), which load() reads instead of parsing the CSV
+    as long as it is newer. The CSV stays the interchange and fallback format.
+    """
+    name = 'csv'
+
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        settings = load_settings()
+        self.journal_enabled = settings.get('csv_journal', True)
+        self.snapshot_enabled = HAVE_PYARROW and settings.get('csv_snapshot', True)
+        self.compact_bytes = settings.get('journal_compact_bytes', 4 * 1024 * 1024)
+
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.csv_path = os.path.join(script_dir, csv_file)
+        self.journal_path = os.path.join(script_dir, os.path.splitext(csv_file)[0] + '.journal')
+        self.snapshot_path = os.path.join(script_dir, os.path.splitext(csv_file)[0] + '.feather')
+        self._lock = threading.Lock()
+        self._compaction = None
+        # Bumped by every full write, so a compaction started before it knows it is stale
+        self._generation = 0
+
+    def load(self):
+        df = self._read_base()
+        if os.path.exists(self.journal_path):
+            df = self._replay(df)
+        return df
+
+    def save(self, df):
+        with self._lock:
+            self._install_base(self._write_temp(df), df)
+            self._truncate_journal(0)
+            self._generation += 1
+
+    def apply(self, df, changed=(), deleted=(), renamed=None, columns=None):
+        """
+        Persist the given row-level changes, which have already been made to `df`.
+
+        changed: paths whose rows were inserted or modified (only `columns`, if given)
+        deleted: paths removed from the library
+        renamed: {old_path: new_path} for moved files
+        """
+        # Bulk changes (e.g. the first scan of a library) are cheaper as one rewrite
+        if not self.journal_enabled or len(changed) + len(deleted) > max(100, len(df) // 10):
+            self.save(df)
+            return
+
+        records = [{'op': 'rename', 'old': old, 'new': new} for old, new in (renamed or {}).items()]
+        records += [{'op': 'delete', 'path': path} for path in deleted]
+        if len(changed):
+            rows = df[df['Path'].isin(changed)]
+            row_columns = list(df.columns) if columns is None else ['Path'] + list(columns)
+            op = 'upsert' if columns is None else 'update'
+            for values in rows[row_columns].to_numpy(dtype=object).tolist():
+                records.append({'op': op, 'row': dict(zip(row_columns, map(_plain_value, values)))})
+        if not records:
+            return
+
+        with self._lock:
+            self._append(records)
+            journal_size = os.path.getsize(self.journal_path)
+
+        if journal_size > self.compact_bytes:
+            self.compact(df)
+
+    def compact(self, df, wait=False):
+        """
+        Fold the journal into the CSV in a background thread, from a snapshot of `df`.
+        """
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        with self._lock:
+            snapshot = df.copy()
+            offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+            generation = self._generation
+
+        def run():
+            tmp_path = None
+            try:
+                # The slow part (writing the CSV) runs without the lock, into a file of its own
+                tmp_path = self._write_temp(snapshot)
+                with self._lock:
+                    if self._generation != generation:
+                        # save() rewrote the CSV meanwhile: it is newer than this snapshot,
+                        # and `offset` no longer points into the current journal
+                        return
+                    self._install_base(tmp_path, snapshot)
+                    tmp_path = None
+                    # Keep only the records appended while the snapshot was being written
+                    self._truncate_journal(offset)
+                    self._generation += 1
+            except Exception as e:
+                print(f"Journal compaction failed, keeping the journal: {e}")
+            finally:
+                if tmp_path is not None and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+        self._compaction = threading.Thread(target=run, daemon=True)
+        self._compaction.start()
+        if wait:
+            self._compaction.join()
+
+    def close(self, df):
+        """
+        Leave a self-contained CSV behind (called when the application exits).
+        """
+        if self._compaction is not None:
+            self._compaction.join()
+        if os.path.exists(self.journal_path) and os.path.getsize(self.journal_path) > 0:
+            self.compact(df, wait=True)
+
+    def _read_base(self):
+        if self.snapshot_enabled and os.path.exists(self.snapshot_path) and os.path.exists(self.csv_path) \
+                and os.path.getmtime(self.snapshot_path) >= os.path.getmtime(self.csv_path):
+            try:
+                df = pd.read_feather(self.snapshot_path)
+                upgrade_metadata(df)
+                return df
+            except Exception as e:
+                print(f"Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+
+        df = load_database(self.csv_file)
+        self._write_snapshot(df)
+        return df
+
+    def _temp_path(self, path):
+        # A temporary file of its own for every writer, next to the file it will replace
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + '.', suffix='.tmp', dir=os.path.dirname(path)
+        )
+        os.close(fd)
+        return tmp_path
+
+    def _write_temp(self, df):
+        """
+        Write `df` as CSV to a new temporary file and return its path.
+        """
+        tmp_path = self._temp_path(self.csv_path)
+        try:
+            df.to_csv(tmp_path, index=False, encoding='utf-8')
+            _fsync_file(tmp_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return tmp_path
+
+    def _install_base(self, tmp_path, df):
+        # Swap the finished file in, so a crash never leaves a half-written CSV
+        os.replace(tmp_path, self.csv_path)
+        self._write_snapshot(df)
+
+    def _write_snapshot(self, df):
+        if not self.snapshot_enabled:
+            return
+        tmp_path = self._temp_path(self.snapshot_path)
+        try:
+            df.reset_index(drop=True).to_feather(tmp_path)
+            os.replace(tmp_path, self.snapshot_path)
+        except Exception as e:
+            # The CSV is authoritative, so a failed snapshot only costs load speed
+            print(f"Could not write snapshot {self.snapshot_path}: {e}")
+            for path in (tmp_path, self.snapshot_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _append(self, records):
+        lines = []
+        for record in records:
+            payload = json.dumps(record, ensure_ascii=False)
+            lines.append(f"{zlib.crc32(payload.encode('utf-8')):08x}\t{payload}\n")
+        with open(self.journal_path, 'a', encoding='utf-8', newline='\n') as journal:
+            journal.write(''.join(lines))
+            journal.flush()
+            os.fsync(journal.fileno())
+
+    def _truncate_journal(self, offset):
+        if not os.path.exists(self.journal_path):
+            return
+        with open(self.journal_path, 'rb') as journal:
+            journal.seek(offset)
+            remainder = journal.read()
+        tmp_path = self.journal_path + '.tmp'
+        with open(tmp_path, 'wb') as journal:
+            journal.write(remainder)
+            journal.flush()
+            os.fsync(journal.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+    def _read_journal(self):
+        """
+        Return the intact journal records. A damaged tail (torn by a crash) is cut off
+        so that new records are not appended after it.
+        """
+        records = []
+        valid_bytes = 0
+        with open(self.journal_path, 'rb') as journal:
+            for line_number, line in enumerate(journal, 1):
+                checksum, _, payload = line.rstrip(b'\n').partition(b'\t')
+                if not line.endswith(b'\n') or checksum != f"{zlib.crc32(payload):08x}".encode('ascii'):
+                    print(f"Ignoring damaged journal record at line {line_number} and everything after it.")
+                    break
+                records.append(json.loads(payload.decode('utf-8')))
+                valid_bytes += len(line)
+
+        if valid_bytes < os.path.getsize(self.journal_path):
+            with open(self.journal_path, 'rb+') as journal:
+                journal.truncate(valid_bytes)
+                os.fsync(journal.fileno())
+        return records
+
+    def _replay(self, df):
+        with self._lock:
+            records = self._read_journal()
+        if not records:
+            return df
+
+        positions = dict(zip(df['Path'], range(len(df))))
+        columns = list(df.columns)
+        touched = {}  # path -> row dict, or None once deleted
+
+        def get(path):
+            if path in touched:
+                return touched[path]
+            if path in positions:
+                return dict(zip(columns, df.iloc[positions[path]].tolist()))
+            return None
+
+        for record in records:
+            op = record['op']
+            if op == 'rename':
+                row = get(record['old'])
+                # Already applied if the row sits at its new path
+                if row is not None and get(record['new']) is None:
+                    row['Path'] = record['new']
+                    touched[record['old']] = None
+                    touched[record['new']] = row
+            elif op == 'delete':
+                touched[record['path']] = None
+            elif op == 'upsert':
+                touched[record['row']['Path']] = dict(record['row'])
+            elif op == 'update':
+                row = get(record['row']['Path'])
+                if row is not None:
+                    row.update(record['row'])
+                    touched[row['Path']] = row
+
+        kept = df[~df['Path'].isin(touched.keys())]
+        replayed = pd.DataFrame([row for row in touched.values() if row is not None], columns=columns)
+        df = pd.concat([kept, replayed], ignore_index=True)
+        upgrade_metadata(df)
+        print(f"Replayed {len(records)} journal record(s) over {self.csv_file}.")
+        return df
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+class SQLiteStorage:
+    """
+    Stores the library in file_database_*.sqlite (WAL mode) so edits become
+    single-row UPDATE/INSERT/DELETE statements instead of full rewrites.
+
+    The DOI column (materialized from the BibTeX like the other BIBTEX_COLUMNS)
+    is indexed, so DOI lookups do not scan the table.
+    """
+    name = 'sqlite'
+
+    def __init__(self, csv_file):
+        self.csv_file = csv_file
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.db_path = os.path.join(script_dir, os.path.splitext(csv_file)[0] + '.sqlite')
+
+        if not os.path.exists(self.db_path):
+            self._build()
+        self._create()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _create(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS papers ('
+                '"Path" TEXT PRIMARY KEY, "Name" TEXT, "Size" INTEGER, "DOI" TEXT)'
+            )
+            # Add columns introduced after the database was created
+            existing = {row[1] for row in conn.execute('PRAGMA table_info(papers)')}
+            for column in DATABASE_COLUMNS:
+                if column not in existing:
+                    conn.execute(f'ALTER TABLE papers ADD COLUMN {_quote(column)}')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_name ON papers ("Name")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_size ON papers ("Size")')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers ("DOI")')
+
+    def _build(self):
+        """
+        Create the database and import the CSV under a temporary name, then move it into
+        place. If the import fails, no half-filled database is left and the next start
+        imports the CSV again.
+        """
+        db_path = self.db_path
+        self.db_path = db_path + '.tmp'
+        try:
+            # Left over by an import that was interrupted
+            for leftover in (self.db_path, self.db_path + '-wal', self.db_path + '-shm'):
+                if os.path.exists(leftover):
+                    os.remove(leftover)
+            self._create()
+            self._migrate_from_csv()
+        finally:
+            self.db_path = db_path
+        # Every connection is closed by now, so the WAL has been checkpointed into the file
+        os.replace(db_path + '.tmp', db_path)
+
+    def _migrate_from_csv(self):
+        """
+        One-shot import of the existing CSV database. The CSV file is left untouched.
+        """
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        if not os.path.exists(os.path.join(script_dir, self.csv_file)):
+            return
+        df = CSVStorage(self.csv_file).load()
+        print(f"Migrating {len(df)} entries from {self.csv_file} to {os.path.basename(self.db_path)}...")
+        self.save(df)
+
+    def _rows(self, df, columns):
+        values = df[columns].to_numpy(dtype=object).tolist()
+        return [[_plain_value(value) for value in row] for row in values]
+
+    def _insert(self, conn, df):
+        columns = [col for col in DATABASE_COLUMNS if col in df.columns]
+        names = [_quote(col) for col in columns]
+        placeholders = ', '.join('?' * len(names))
+        conn.executemany(
+            f'INSERT OR REPLACE INTO papers ({", ".join(names)}) VALUES ({placeholders})',
+            self._rows(df, columns)
+        )
+
+    def close(self, df):
+        pass
+
+    def load(self):
+        columns = ', '.join(_quote(col) for col in DATABASE_COLUMNS)
+        with closing(self._connect()) as conn:
+            df = pd.read_sql_query(f'SELECT {columns} FROM papers ORDER BY rowid', conn, dtype={'Mtime': 'Int64'})
+        df['Modified Date'] = df['Modified Date'].astype(object)
+
+        mask = upgrade_metadata(df)
+        if mask.any():
+            self.apply(df, changed=df.loc[mask, 'Path'], columns=BIBTEX_COLUMNS)
+        return df
+
+    def save(self, df):
+        with closing(self._connect()) as conn, conn:
+            conn.execute('DELETE FROM papers')
+            self._insert(conn, df)
+
+    def apply(self, df, changed=(), deleted=(), renamed=None, columns=None):
+        """
+        Persist the given row-level changes, which have already been made to `df`,
+        in a single transaction. See CSVStorage.apply for the arguments.
+        """
+        with closing(self._connect()) as conn, conn:
+            if renamed:
+                conn.executemany(
+                    'UPDATE papers SET "Path" = ? WHERE "Path" = ?',
+                    [(new_path, old_path) for old_path, new_path in renamed.items()]
+                )
+            if len(deleted):
+                conn.executemany('DELETE FROM papers WHERE "Path" = ?', [(path,) for path in deleted])
+            if len(changed):
+                rows = df[df['Path'].isin(changed)]
+                if columns is None:
+                    self._insert(conn, rows)
+                else:
+                    columns = list(columns)
+                    assignments = [f'{_quote(col)} = ?' for col in columns]
+                    conn.executemany(
+                        f'UPDATE papers SET {", ".join(assignments)} WHERE "Path" = ?',
+                        [values + [path] for values, path in zip(self._rows(rows, columns), rows['Path'])]
+                    )
+
+
+STORAGE_ENGINES = {engine.name: engine for engine in (CSVStorage, SQLiteStorage)}
+
+
+def open_storage(csv_file):
+    """
+    Open the storage engine selected by the 'storage_backend' setting for the given database.
+    """
+    if not csv_file:
+        return None
+    backend = load_settings().get('storage_backend', 'csv')
+    if backend not in STORAGE_ENGINES:
+        print(f"Unknown storage backend '{backend}', using CSV.")
+        backend = 'csv'
+    return STORAGE_ENGINES[backend](csv_file)
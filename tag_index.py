@@ -0,0 +1,75 @@
+import re
+
+import numpy as np
+
+# Tags are written in the comments in curly braces: {tag}
+TAG_PATTERN = re.compile(r'\{(.*?)\}')
+
+
+class TagIndex:
+    """
+    Inverted index of the {tags} in the Comments column: tag -> set of paths.
+
+    Built when the database is loaded and then refreshed only for the rows that
+    change, like SearchCorpus, so listing tags and filtering by one never scans
+    the comments. Tags match case-insensitively; each is shown with the spelling
+    it was first seen with.
+    """
+
+    def __init__(self):
+        self.paths_by_tag = {}
+        self.tags_by_path = {}
+        self.spellings = {}
+
+    def rebuild(self, df):
+        self.paths_by_tag = {}
+        self.tags_by_path = {}
+        self.spellings = {}
+        self._store(df)
+
+    def update(self, df, paths):
+        """
+        Re-read the tags of the rows of `df` with the given paths.
+        """
+        paths = set(paths)
+        self.discard(paths)
+        if paths and not df.empty:
+            mask = np.fromiter((path in paths for path in df['Path'].tolist()), dtype=bool, count=len(df))
+            self._store(df[mask])
+
+    def discard(self, paths):
+        for path in paths:
+            for tag in self.tags_by_path.pop(path, ()):
+                tagged = self.paths_by_tag[tag]
+                tagged.discard(path)
+                if not tagged:
+                    del self.paths_by_tag[tag]
+                    del self.spellings[tag]
+
+    def _store(self, rows):
+        if rows.empty or 'Comments' not in rows.columns:
+            return
+        for path, comments in zip(rows['Path'], rows['Comments']):
+            if not isinstance(comments, str) or '{' not in comments:
+                continue
+            tags = set()
+            for tag in TAG_PATTERN.findall(comments):
+                key = tag.lower()
+                self.spellings.setdefault(key, tag)
+                tags.add(key)
+            if tags:
+                self.tags_by_path[path] = tags
+                for key in tags:
+                    self.paths_by_tag.setdefault(key, set()).add(path)
+
+    def tag_counts(self):
+        """
+        [(tag, number of papers)], sorted by tag.
+        """
+        return sorted(
+            ((self.spellings[key], len(paths)) for key, paths in self.paths_by_tag.items()),
+            key=lambda item: item[0]
+        )
+
+    def paths_with_tag(self, tag):
+        return self.paths_by_tag.get(tag.lower(), set())
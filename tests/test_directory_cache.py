@@ -0,0 +1,27 @@
+import os
+
+from database_utils import walk_directory
+from directory_cache import DirectoryCache
+
+
+def test_cached_listing_sees_files_edited_in_place(tmp_path):
+    folder = tmp_path / 'library'
+    folder.mkdir()
+    paper = folder / 'paper.pdf'
+    paper.write_bytes(b'%PDF' * 2000)
+    # Old enough for its listing to be cached
+    os.utime(folder, (1_000_000_000, 1_000_000_000))
+
+    cache = DirectoryCache(str(tmp_path / 'dirs.pkl'))
+    assert [item[3] for item in walk_directory(str(folder), cache=cache)] == [8000]
+
+    # Rewriting the file keeps the folder's mtime, so the listing comes from the cache
+    paper.write_bytes(b'%PDF' * 3250)
+    os.utime(folder, (1_000_000_000, 1_000_000_000))
+    cache.rotate()
+    listed = list(walk_directory(str(folder), cache=cache))
+
+    assert str(folder) in cache.entries
+    assert [(item[0], item[3], item[4]) for item in listed] == [
+        (str(paper), 13000, os.stat(paper).st_mtime_ns)
+    ]
@@ -0,0 +1,16 @@
+import os
+
+from file_hashing import HashCache
+
+
+def test_prune_drops_only_stale_entries_of_the_directory(tmp_path):
+    cache = HashCache(str(tmp_path / 'hashes.sqlite'))
+    library = os.path.join(str(tmp_path), 'library')
+    other = os.path.join(str(tmp_path), 'library-other')
+    kept = os.path.join(library, 'kept.pdf')
+    gone = os.path.join(library, 'sub', 'gone.pdf')
+    elsewhere = os.path.join(other, 'paper.pdf')
+    cache.store({path: (1, 1, 'quick', None) for path in (kept, gone, elsewhere)})
+
+    assert cache.prune(library, [kept]) == 1
+    assert set(cache.lookup([kept, gone, elsewhere])) == {kept, elsewhere}
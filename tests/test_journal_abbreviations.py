@@ -0,0 +1,16 @@
+from journal_abbreviations import build_abbreviator
+
+
+def test_tables_extend_the_built_in_list(tmp_path):
+    table = tmp_path / 'journal_abbreviations_test.csv'
+    table.write_text(
+        '"Liquid Crystals","Liq. Cryst."\n'
+        '"Physical Review Letters","Phys. Rev. L."\n',
+        encoding='utf-8'
+    )
+    abbreviator = build_abbreviator([str(table)])
+
+    assert abbreviator.abbreviate("Liquid {C}rystals") == "Liq. Cryst."
+    # Built-in entries win over the tables
+    assert abbreviator.abbreviate("Physical Review Letters") == "Phys. Rev. Lett."
+    assert abbreviator.abbreviate("Journal of Soft Matter") == "J. Soft Matter"
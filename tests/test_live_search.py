@@ -0,0 +1,62 @@
+import random
+
+import pandas as pd
+import pytest
+
+from engine import Library
+from search_query import parse_query, refines
+from utils import DATABASE_COLUMNS
+
+pytest.importorskip('fuzzywuzzy')
+
+TEXTS = [
+    'foo-barx notes', 'foo bar', 'x foéob y', 'foobar', 'the foo-bar paper', 'fo-ob', 'müller liquid crystals',
+    'mller', 'barx foo', 'no match here',
+]
+
+
+def _library(texts):
+    df = pd.DataFrame({column: [''] * len(texts) for column in DATABASE_COLUMNS})
+    df['Path'] = [f'/library/{i}.pdf' for i in range(len(texts))]
+    df['Name'] = texts
+    for column in ('Date Added', 'Last Used Time'):
+        df[column] = pd.NaT
+    library = Library()
+    library.df = df
+    library.rebuild_indexes()
+    return library
+
+
+def _search(library, text):
+    return library.fuzzy_search(library.df, parse_query(text).keywords, 100, use_index=False)
+
+
+def test_punctuated_queries_are_not_refined():
+    library = _library(TEXTS)
+    # The longer query matches a row the shorter one did not, so refining would lose it
+    assert not set(_search(library, 'foo-barx')['Path']) <= set(_search(library, 'foo-bar')['Path'])
+    assert not refines('foo-bar', 'foo-barx')
+    assert not refines('foo', 'foo.')
+    assert not refines('author:smith', 'author:smith foo')
+    assert refines('foo', 'foob')
+    assert refines('foo', 'foo bar')
+
+
+def test_refined_search_matches_full_search():
+    rng = random.Random(7)
+    words = ['foo', 'foob', 'bar', 'barx', 'foéob', 'müller', 'mller', 'liquid', 'crystal', 'optics']
+    texts = TEXTS + [
+        ' '.join(rng.choice(words) + rng.choice(['', '-', '.', 'é', 'x']) for _ in range(rng.randint(1, 5)))
+        for _ in range(300)
+    ]
+    library = _library(texts)
+    queries = ['f', 'fo', 'foo', 'foob', 'foo b', 'foo ba', 'foo bar', 'm', 'ml', 'mll', 'mlle', 'mller', 'c', 'cr']
+    checked = 0
+    for previous in queries:
+        for query in queries:
+            if not refines(previous, query):
+                continue
+            refined = library.refine_search(_search(library, previous), parse_query(query).keywords, 100)
+            assert refined['Path'].tolist() == _search(library, query)['Path'].tolist(), (previous, query)
+            checked += 1
+    assert checked > 10
@@ -0,0 +1,67 @@
+import os
+
+import pandas as pd
+
+from database_utils import reconcile, walk_directory
+from utils import DATABASE_COLUMNS
+
+
+def _database(paths):
+    df = pd.DataFrame({column: [''] * len(paths) for column in DATABASE_COLUMNS})
+    df['Path'] = pd.Series(paths, dtype='str')
+    df['Size'] = [os.path.getsize(path) if os.path.exists(path) else 100 for path in paths]
+    df['Mtime'] = pd.array([os.stat(path).st_mtime_ns if os.path.exists(path) else 0 for path in paths], dtype='Int64')
+    return df
+
+
+def test_only_rows_in_walked_directories_are_missing(tmp_path):
+    root = str(tmp_path / 'library')
+    os.makedirs(os.path.join(root, 'readable'))
+    with open(os.path.join(root, 'readable', 'kept.pdf'), 'wb') as file:
+        file.write(b'%PDF')
+    df = _database([
+        os.path.join(root, 'readable', 'kept.pdf'),
+        os.path.join(root, 'readable', 'deleted.pdf'),
+        os.path.join(root, 'unavailable', 'paper.pdf'),
+        os.path.join(str(tmp_path), 'elsewhere', 'paper.pdf'),
+    ])
+
+    walked = set()
+    files = list(walk_directory(root, walked=walked))
+    diff = reconcile(df, files, walked)
+
+    assert diff.missing == [os.path.join(root, 'readable', 'deleted.pdf')]
+    assert len(diff.new) == 0
+
+
+def test_unreadable_root_walks_nothing(tmp_path):
+    walked = set()
+    assert list(walk_directory(str(tmp_path / 'gone'), walked=walked)) == []
+    assert walked == set()
+
+
+def test_empty_database(tmp_path):
+    with open(str(tmp_path / 'paper.pdf'), 'wb') as file:
+        file.write(b'%PDF')
+    walked = set()
+    files = list(walk_directory(str(tmp_path), walked=walked))
+    diff = reconcile(_database([]), files, walked)
+
+    assert diff.new['Path'].tolist() == [str(tmp_path / 'paper.pdf')]
+    assert diff.missing == []
+
+
+def test_diff_applies_to_a_newer_frame(tmp_path):
+    path = str(tmp_path / 'paper.pdf')
+    with open(path, 'wb') as file:
+        file.write(b'%PDF')
+    walked = set()
+    diff = reconcile(_database([]), list(walk_directory(str(tmp_path), walked=walked)), walked)
+
+    # The file was added to the database while the diff was computed
+    current = _database([path])
+    current['Comments'] = 'edited meanwhile'
+    updated = diff.apply(current)
+
+    assert updated['Path'].tolist() == [path]
+    assert updated['Comments'].tolist() == ['edited meanwhile']
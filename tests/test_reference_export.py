@@ -0,0 +1,33 @@
+import pandas as pd
+
+from bibtex_parser import BIBTEX_COLUMNS, bibtex_metadata
+from reference_export import export_references, format_reference
+
+ENTRY = (
+    "@article{a, title={The {DNA} story}, author={Livolant, Fran{\\c{c}}oise and Bouligand, Yves}, "
+    "journal={Physical Review Letters}, year={1986}, volume={47}, number={3}, pages={100--110}, doi={10.1/x}}"
+)
+
+
+def _rows(entries):
+    df = pd.DataFrame({'BibTeX': entries})
+    df[BIBTEX_COLUMNS] = pd.DataFrame(
+        [bibtex_metadata(entry) if entry else [pd.NA] * len(BIBTEX_COLUMNS) for entry in entries]
+    )
+    return df
+
+
+def test_references_come_from_the_columns():
+    row = _rows([ENTRY]).iloc[0]
+    assert format_reference(row, 'lc') == (
+        "Livolant F, Bouligand Y. The DNA story. Phys Rev Lett. 1986;47(3):100–110. doi: 10.1/x"
+    )
+    # An edited column is formatted again, even though the BibTeX text is unchanged
+    row['Year'] = '1987'
+    assert '1987;47(3)' in format_reference(row, 'lc')
+
+
+def test_export_skips_rows_without_data():
+    parts = []
+    assert export_references(_rows([ENTRY, None, '']), 'aps', parts.append) == (1, 2)
+    assert parts[0].startswith("1. F. Livolant and Y. Bouligand,")
@@ -0,0 +1,44 @@
+import pandas as pd
+
+from engine import Library
+from utils import DATABASE_COLUMNS
+
+
+class _Storage:
+    def apply(self, df, **changes):
+        pass
+
+
+def _library(paths):
+    df = pd.DataFrame({column: [''] * len(paths) for column in DATABASE_COLUMNS})
+    df['Path'] = paths
+    df['Comments'] = ['{optics}' if i % 2 == 0 else '' for i in range(len(paths))]
+    for column in ('Date Added', 'Last Used Time'):
+        df[column] = pd.NaT
+    library = Library()
+    library.storage = _Storage()
+    library.df = df
+    library.rebuild_indexes()
+    return library
+
+
+def _tagged(library):
+    return library.rows_with_paths(library.tag_index.paths_with_tag('optics'))['Path'].tolist()
+
+
+def test_rows_by_path_follow_edits():
+    library = _library([f'/library/{i}.pdf' for i in range(6)])
+    assert _tagged(library) == ['/library/0.pdf', '/library/2.pdf', '/library/4.pdf']
+
+    library.forget(['/library/0.pdf', '/library/3.pdf'])
+    assert _tagged(library) == ['/library/2.pdf', '/library/4.pdf']
+
+    library.rename('/library/2.pdf', '/library/moved.pdf')
+    library.set_comments('/library/5.pdf', '{optics}')
+    assert _tagged(library) == ['/library/moved.pdf', '/library/4.pdf', '/library/5.pdf']
+
+    # A row added at the end, as a rescan does
+    new = library.df.iloc[[0]].assign(Path='/library/new.pdf', Comments='{optics}')
+    library.df = pd.concat([library.df, new], ignore_index=True)
+    library.refresh_rows(changed=['/library/new.pdf'])
+    assert _tagged(library) == ['/library/moved.pdf', '/library/4.pdf', '/library/5.pdf', '/library/new.pdf']
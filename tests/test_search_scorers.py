@@ -0,0 +1,81 @@
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('rapidfuzz')
+
+from search_scorers import BatchScorer, ReferenceScorer  # noqa: E402
+
+TEXTS = [
+    "/papers/optics/smith2020_liquid_crystal_lasers.pdf smith2020.pdf @article{smith2020, "
+    "title={liquid crystal lasers}, author={smith, john}}",
+    "/papers/fluids/active_nematics_turbulence.pdf active_nematics_turbulence.pdf",
+    "/papers/misc/crystal liquid phases.pdf crystal liquid phases.pdf {review}",
+    "/papers/optics/metasurface holography.pdf metasurface holography.pdf",
+    "/papers/optics/liqid cristal display.pdf liqid cristal display.pdf",
+    "/papers/bio/cell motility in confinement.pdf cell motility in confinement.pdf {cells}",
+    "/papers/soft/colloidal self-assembly.pdf colloidal self-assembly.pdf",
+    "/papers/soft/topological defects in nematic shells.pdf nematic shells",
+    "",
+    "x",
+]
+
+KEYWORD_SETS = [
+    ["liquid", "crystal"],       # substring shortcut
+    ["crystal"],                 # substring shortcut, single keyword
+    ["liquid crystal"],          # phrase that only some texts contain verbatim
+    ["liqid", "cristal"],        # typos: partial_ratio path
+    ["nematic", "turbulance"],   # one exact, one misspelled keyword
+    ["crystal liquid"],          # reordered words: token_set_ratio path
+    ["lasers", "smith"],
+    ["holography", "metasurface"],
+    ["zebrafish"],               # nothing matches
+    ["self-assembly", "colloid"],
+]
+
+THRESHOLDS = [50, 70, 85, 95, 100]
+
+
+def _random_texts(count, seed=1):
+    """
+    Texts made of jumbled and misspelled words from TEXTS, to hit every scoring path.
+    """
+    rng = random.Random(seed)
+    words = ' '.join(TEXTS).replace('/', ' ').split()
+    texts = []
+    for _ in range(count):
+        chosen = rng.sample(words, rng.randint(1, 12))
+        if rng.random() < 0.5:
+            word = rng.randrange(len(chosen))
+            position = rng.randrange(len(chosen[word]))
+            chosen[word] = chosen[word][:position] + chosen[word][position + 1:]
+        texts.append(' '.join(chosen).lower())
+    return texts
+
+
+@pytest.mark.parametrize('threshold', THRESHOLDS)
+@pytest.mark.parametrize('keywords', KEYWORD_SETS, ids=' '.join)
+def test_batch_scorer_matches_reference(keywords, threshold):
+    texts = pd.Series([text.lower() for text in TEXTS] + _random_texts(300))
+    expected = ReferenceScorer().match(texts, keywords, threshold)
+    actual = BatchScorer().match(texts, keywords, threshold)
+    assert np.array_equal(actual, expected)
+
+
+def test_all_paths_are_exercised():
+    """
+    The fixtures contain rows decided by each stage: the substring shortcut, and
+    rows that only partial_ratio or token_set_ratio accept.
+    """
+    texts = pd.Series([text.lower() for text in TEXTS])
+
+    def contains_all(keywords):
+        return np.logical_and.reduce([texts.str.contains(kw, regex=False).to_numpy() for kw in keywords])
+
+    assert contains_all(["liquid", "crystal"]).any()
+    typos = ReferenceScorer().match(texts, ["liqid", "cristal"], 80)
+    assert (typos & ~contains_all(["liqid", "cristal"])).any()
+    reordered = ReferenceScorer().match(texts, ["crystal liquid"], 90)
+    assert (reordered & ~contains_all(["crystal liquid"])).any()
@@ -0,0 +1,94 @@
+import os
+import threading
+
+import pandas as pd
+import pytest
+
+import storage as storage_module
+import utils
+from storage import CSVStorage, SQLiteStorage
+from utils import DATABASE_COLUMNS
+
+
+def _storage(tmp_path):
+    storage = CSVStorage('file_database_test.csv')
+    storage.csv_path = str(tmp_path / 'file_database_test.csv')
+    storage.journal_path = str(tmp_path / 'file_database_test.journal')
+    storage.snapshot_enabled = False
+    return storage
+
+
+def _library(comment):
+    df = pd.DataFrame({column: [''] * 3 for column in DATABASE_COLUMNS})
+    df['Path'] = ['/a.pdf', '/b.pdf', '/c.pdf']
+    df['Comments'] = comment
+    return df
+
+
+def test_save_during_compaction_wins(tmp_path):
+    storage = _storage(tmp_path)
+    old = _library('old')
+    storage.save(old)
+    storage.apply(old, changed=['/a.pdf'], columns=['Comments'])
+
+    # Hold the compaction after it has written its snapshot of the old rows
+    written = threading.Event()
+    release = threading.Event()
+    write_temp = storage._write_temp
+
+    def slow_write_temp(df):
+        path = write_temp(df)
+        if threading.current_thread() is not threading.main_thread():
+            written.set()
+            release.wait(5)
+        return path
+
+    storage._write_temp = slow_write_temp
+    storage.compact(old)
+    assert written.wait(5)
+
+    new = _library('new')
+    storage.save(new)
+    release.set()
+    storage._compaction.join()
+
+    assert pd.read_csv(storage.csv_path, keep_default_na=False)['Comments'].tolist() == ['new'] * 3
+    assert [name for name in os.listdir(tmp_path) if name.endswith('.tmp')] == []
+
+
+def test_compaction_keeps_records_appended_meanwhile(tmp_path):
+    storage = _storage(tmp_path)
+    df = _library('first')
+    storage.save(df)
+    storage.apply(df, changed=['/a.pdf'], columns=['Comments'])
+    journal_before = os.path.getsize(storage.journal_path)
+
+    storage.compact(df, wait=True)
+    assert os.path.getsize(storage.journal_path) == 0 < journal_before
+
+    df.loc[df['Path'] == '/b.pdf', 'Comments'] = 'second'
+    storage.apply(df, changed=['/b.pdf'], columns=['Comments'])
+    assert os.path.getsize(storage.journal_path) > 0
+
+
+def test_failed_sqlite_migration_runs_again(tmp_path, monkeypatch):
+    # The databases live next to the scripts
+    monkeypatch.setattr(storage_module, '__file__', str(tmp_path / 'storage.py'))
+    monkeypatch.setattr(utils, '__file__', str(tmp_path / 'utils.py'))
+    csv_storage = CSVStorage('file_database_test.csv')
+    csv_storage.snapshot_enabled = False
+    csv_storage.save(_library('kept'))
+
+    def fail(self, df):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(SQLiteStorage, 'save', fail)
+        with pytest.raises(OSError):
+            SQLiteStorage('file_database_test.csv')
+    assert not (tmp_path / 'file_database_test.sqlite').exists()
+
+    df = SQLiteStorage('file_database_test.csv').load()
+    assert df['Path'].tolist() == ['/a.pdf', '/b.pdf', '/c.pdf']
+    assert df['Comments'].tolist() == ['kept'] * 3
+    assert sorted(path.name for path in tmp_path.glob('*.sqlite*')) == ['file_database_test.sqlite']
@@ -4,10 +4,9 @@ import pandas as pd
 from random import choice
 from string import ascii_lowercase
 from json import loads
-from pdf2doi import pdf2doi
 import re
-import tkinter as tk
-from tkinter import Toplevel, Label, Frame, Button, Radiobutton
+from bibtex_parser import BIBTEX_COLUMNS, bibtex_metadata, parse_bibtex
+from journal_abbreviations import abbreviate_journal
 
 def load_default_directory():
     logger = logging.getLogger(__name__)
@@ -33,36 +32,127 @@ def generate_safe_filename_from_directory(directory):
     safe_filename = safe_filename[:200]
     return f"file_database_{safe_filename}.csv"
 
+# Columns of a library database, in the order they are stored
+DATABASE_COLUMNS = ['Path', 'Name', 'Size', 'Modified Date', 'BibTeX', 'Comments', 'Last Used Time', 'Date Added', 'Title', 'Author', 'Year', 'DOI', 'Journal', 'Volume', 'Pages', 'Number', 'Publisher', 'Fingerprint', 'Mtime']
+
+DEFAULT_SETTINGS = {
+    # 'csv' or 'sqlite' (see storage.py)
+    'storage_backend': 'csv',
+    # Extract and index PDF text on "Update Database" (see fulltext_index.py)
+    'fulltext_index': False,
+    # DOI extraction: worker processes and seconds allowed per file (see doi_extraction.py)
+    'doi_workers': 4,
+    'doi_timeout': 120,
+    # Entries kept in the shared DOI cache (see doi_cache.py)
+    'doi_cache_entries': 50000,
+    # Threads listing directories on "Update Database"; raise it for network shares
+    'scan_workers': 1,
+    # Reuse listings of unchanged folders for this many hours (0 = always scan everything)
+    'scan_cache_hours': 24,
+    # Watch mode: quiet seconds before applying changes, and the polling interval without watchdog
+    'watch_settle_seconds': 2,
+    'watch_poll_seconds': 10,
+    # Time windows of the "Recently Added Papers" and "Recently Opened Papers" buttons
+    'recent_added_days': 7,
+    'recent_opened_days': 3,
+}
+
+def load_settings():
+    """
+    Read optional overrides from settings.json next to the scripts.
+    """
+    logger = logging.getLogger(__name__)
+    settings = dict(DEFAULT_SETTINGS)
+    script_directory = os.path.dirname(os.path.abspath(__file__))
+    settings_file = os.path.join(script_directory, 'settings.json')
+
+    if os.path.exists(settings_file):
+        try:
+            with open(settings_file, 'r', encoding='utf-8') as file:
+                settings.update(loads(file.read()))
+        except Exception as e:
+            logger.error(f"Error reading settings: {e}")
+    return settings
+
+# Columns kept as datetime64 in memory and stored as DATE_FORMAT text
+DATE_COLUMNS = ['Date Added', 'Last Used Time']
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def parse_dates(values):
+    """
+    Parse stored date strings (normally DATE_FORMAT) into datetime64; unreadable ones become NaT.
+    """
+    dates = pd.to_datetime(values, format=DATE_FORMAT, errors='coerce')
+    # Fall back to guessing the format for the few values written differently
+    odd = dates.isna() & values.notna()
+    if odd.any():
+        dates[odd] = pd.to_datetime(values[odd].astype(str), format='mixed', errors='coerce')
+    return dates.astype('datetime64[ns]')
+
+def set_bibtex_metadata(df, mask):
+    """
+    Refresh the columns materialized from BibTeX (BIBTEX_COLUMNS) for the rows selected by `mask`.
+    Call it whenever the BibTeX of a row changes, so nothing downstream has to parse BibTeX again.
+    """
+    bibtex = df.loc[mask, 'BibTeX']
+    if len(bibtex):
+        df.loc[mask, BIBTEX_COLUMNS] = pd.DataFrame(
+            [bibtex_metadata(entry) for entry in bibtex], index=bibtex.index, columns=BIBTEX_COLUMNS
+        )
+
+def upgrade_metadata(df):
+    """
+    Fill the BibTeX columns for rows that have BibTeX but are missing the extracted metadata.
+    Returns the mask of upgraded rows.
+    """
+    for col in BIBTEX_COLUMNS + ['Fingerprint']:
+        if col not in df.columns:
+            df[col] = pd.NA
+        # FIX: Force the column to be 'object' (text) so Pandas doesn't complain 
+        # when we insert strings into an empty column.
+        df[col] = df[col].astype('object')
+    # File modification time in integer nanoseconds, compared exactly on rescans
+    if 'Mtime' not in df.columns:
+        df['Mtime'] = pd.NA
+    df['Mtime'] = df['Mtime'].astype('Int64')
+    # Dates are parsed once here, so views never parse the text again
+    for col in DATE_COLUMNS:
+        if col not in df.columns:
+            df[col] = pd.NaT
+        if not pd.api.types.is_datetime64_any_dtype(df[col]):
+            df[col] = parse_dates(df[col])
+
+    # --- SELF-HEALING DATABASE LOGIC ---
+    # A parsed entry stores '' for the fields it does not have, so only rows that were
+    # never parsed (or predate a column) are missing values here
+    mask = df['BibTeX'].notna() & df[BIBTEX_COLUMNS].isna().any(axis=1)
+
+    if mask.any():
+        print(f"Upgrading database: Extracting metadata for {mask.sum()} entries...")
+        set_bibtex_metadata(df, mask)
+    return mask
+
 def load_database(csv_file):
     script_dir = os.path.dirname(os.path.abspath(__file__))
     csv_path = os.path.join(script_dir, csv_file)
     
-    # --- NEW: Added Title, Author, and Year to the schema ---
-    columns =['Path', 'Name', 'Size', 'Modified Date', 'BibTeX', 'Comments', 'Last Used Time', 'Date Added', 'Title', 'Author', 'Year']
+    columns = DATABASE_COLUMNS
     
     if os.path.exists(csv_path):
-        df = pd.read_csv(csv_path, encoding='utf-8', dtype={'Modified Date': str})
+        # Empty BibTeX columns stay '' (parsed, field absent) instead of NaN (not parsed yet)
+        df = pd.read_csv(
+            csv_path, encoding='utf-8',
+            dtype={'Modified Date': str, 'Mtime': 'Int64', **{col: str for col in BIBTEX_COLUMNS}},
+            keep_default_na=False,
+            na_values={col: [''] for col in columns if col not in BIBTEX_COLUMNS},
+        )
         
         # Ensure new columns exist in older databases AND have the correct dtype
-        for col in['Title', 'Author', 'Year']:
-            if col not in df.columns:
-                df[col] = pd.NA
-            # FIX: Force the column to be 'object' (text) so Pandas doesn't complain 
-            # when we insert strings into an empty column.
-            df[col] = df[col].astype('object')
+        mask = upgrade_metadata(df)
                 
         df = df.loc[:, df.columns.intersection(columns)]
         
-        # --- SELF-HEALING DATABASE LOGIC ---
-        # Find rows that have BibTeX but are missing the extracted metadata
-        mask = df['BibTeX'].notna() & (df['Title'].isna() | df['Author'].isna() | df['Year'].isna())
-        
         if mask.any():
-            print(f"Upgrading database: Extracting metadata for {mask.sum()} entries...")
-            df.loc[mask, 'Title'] = df.loc[mask, 'BibTeX'].apply(lambda x: parse_bibtex_field(x, 'title'))
-            df.loc[mask, 'Author'] = df.loc[mask, 'BibTeX'].apply(lambda x: parse_bibtex_field(x, 'author'))
-            df.loc[mask, 'Year'] = df.loc[mask, 'BibTeX'].apply(lambda x: parse_bibtex_field(x, 'year'))
-            
             # Save the upgraded database immediately
             df.to_csv(csv_path, index=False, encoding='utf-8')
             
@@ -70,6 +160,7 @@ def load_database(csv_file):
     else:
         df = pd.DataFrame(columns=columns)
         df.to_csv(csv_path, index=False, encoding='utf-8')
+        upgrade_metadata(df)
         return df
 
 def generate_unique_key(authors, year):
@@ -80,6 +171,8 @@ def generate_unique_key(authors, year):
     return f"{first_author_last_name}{year}{random_letter}"
 
 def extract_doi(pdf_path):
+    # Imported here: pdf2doi is slow to import and only the DOI workers need it
+    from pdf2doi import pdf2doi
     try:
         result = pdf2doi(pdf_path)
         doi = result['identifier']
@@ -114,58 +207,12 @@ def extract_doi(pdf_path):
 def parse_bibtex_field(bibtex_str, field_name):
     if not isinstance(bibtex_str, str):
         return ''
-    pattern = re.compile(rf'{field_name}\s*=\s*\{{(.*?)\}}', re.IGNORECASE | re.DOTALL)
-    match = pattern.search(bibtex_str)
-    if match:
-        return match.group(1).replace('\n', ' ').strip()
-    else:
-        return ''
-
-def show_duplicates_dialog(root, duplicates, font):
-    selected_file =[]
-
-    def on_confirm():
-        if selected_var.get():
-            selected_file.append(selected_var.get())
-        dialog_window.destroy()
-
-    dialog_window = Toplevel(root)
-    dialog_window.title("Select File to Delete")
-    dialog_window.geometry("1150x200")
-
-    frame = Frame(dialog_window)
-    frame.pack(fill="both", expand=True, padx=10, pady=10)
-
-    Label(frame, text="Select the file you want to DELETE:", font=font).pack(anchor="w", pady=(0, 10))
-
-    selected_var = tk.StringVar(value="")
-
-    for _, row in duplicates.iterrows():
-        Radiobutton(
-            frame,
-            text=f"Path: {row['Path']}",
-            variable=selected_var,
-            value=row['Path'],
-            anchor="w",
-            justify="left"
-        ).pack(anchor="w")
-
-    Button(
-        dialog_window, text="Confirm", command=on_confirm, font=font, width=10
-    ).pack(pady=10)
-
-    dialog_window.grab_set()
-    dialog_window.wait_window()
-
-    return selected_file
+    return parse_bibtex(bibtex_str).get(field_name.lower(), '')
 
 def parse_doi_from_bibtex(bibtex_str):
     if not isinstance(bibtex_str, str):
         return ''
-    doi = parse_bibtex_field(bibtex_str, 'doi')
-    if not doi:
-        doi = parse_bibtex_field(bibtex_str, 'DOI')
-    return doi.strip() if doi else ''
+    return parse_bibtex(bibtex_str).get('doi', '')
     
 def format_authors_apa(author_field):
     if not author_field:
@@ -209,20 +256,24 @@ def format_authors_aps(author_field):
     else:
         return ", ".join(formatted[:-1]) + ", and " + formatted[-1]
 
-def bibtex_to_reference_aps(bibtex_str):
-    if not isinstance(bibtex_str, str):
-        return ""
+def _reference_field(row, column):
+    value = row.get(column)
+    return value if isinstance(value, str) else ''
 
-    authors = parse_bibtex_field(bibtex_str, 'author')
-    title = parse_bibtex_field(bibtex_str, 'title')
-    journal = parse_bibtex_field(bibtex_str, 'journal')
+def format_reference_aps(row):
+    """
+    APS style reference from the BibTeX columns of a database row (a Series or a dict).
+    """
+    authors = _reference_field(row, 'Author')
+    title = _reference_field(row, 'Title')
+    journal = _reference_field(row, 'Journal')
     if journal:
         journal = abbreviate_journal(journal)
-    year = parse_bibtex_field(bibtex_str, 'year')
-    volume = parse_bibtex_field(bibtex_str, 'volume')
-    number = parse_bibtex_field(bibtex_str, 'number')
-    pages = parse_bibtex_field(bibtex_str, 'pages')
-    doi = parse_doi_from_bibtex(bibtex_str)
+    year = _reference_field(row, 'Year')
+    volume = _reference_field(row, 'Volume')
+    number = _reference_field(row, 'Number')
+    pages = _reference_field(row, 'Pages')
+    doi = _reference_field(row, 'DOI')
 
     parts =[]
 
@@ -250,58 +301,6 @@ def bibtex_to_reference_aps(bibtex_str):
 
     return " ".join(parts)
 
-def abbreviate_journal(journal_name):
-    if not journal_name:
-        return ""
-        
-    exact_matches = {
-        "Physical Review A": "Phys. Rev. A",
-        "Physical Review B": "Phys. Rev. B",
-        "Physical Review C": "Phys. Rev. C",
-        "Physical Review D": "Phys. Rev. D",
-        "Physical Review E": "Phys. Rev. E",
-        "Physical Review X": "Phys. Rev. X",
-        "Physical Review Letters": "Phys. Rev. Lett.",
-        "Applied Physics Letters": "Appl. Phys. Lett.",
-        "Journal of Applied Physics": "J. Appl. Phys.",
-        "Optics Letters": "Opt. Lett.",
-        "Optics Express": "Opt. Express",
-        "Nature Photonics": "Nat. Photonics",
-        "Nature Communications": "Nat. Commun.",
-        "Journal of the Optical Society of America A": "J. Opt. Soc. Am. A",
-        "Journal of the Optical Society of America B": "J. Opt. Soc. Am. B",
-        "Proceedings of the National Academy of Sciences": "Proc. Natl. Acad. Sci. U.S.A.",
-        "Light: Science & Applications": "Light Sci. Appl."
-    }
-    
-    exact_matches_lower = {k.lower(): v for k, v in exact_matches.items()}
-    if journal_name.lower() in exact_matches_lower:
-        return exact_matches_lower[journal_name.lower()]
-        
-    word_replacements = {
-        r'\bJournal\b': 'J.', r'\bReview\b': 'Rev.', r'\bReviews\b': 'Rev.',
-        r'\bPhysical\b': 'Phys.', r'\bPhysics\b': 'Phys.', r'\bApplied\b': 'Appl.',
-        r'\bLetters\b': 'Lett.', r'\bOptics\b': 'Opt.', r'\bOptical\b': 'Opt.',
-        r'\bSociety\b': 'Soc.', r'\bAmerica\b': 'Am.', r'\bAmerican\b': 'Am.',
-        r'\bInternational\b': 'Int.', r'\bCommunications\b': 'Commun.',
-        r'\bNature\b': 'Nat.', r'\bScience\b': 'Sci.', r'\bEngineering\b': 'Eng.',
-        r'\bTechnology\b': 'Technol.', r'\bProceedings\b': 'Proc.',
-        r'\bTransactions\b': 'Trans.', r'\bNational\b': 'Natl.',
-        r'\bAcademy\b': 'Acad.', r'\bInstitute\b': 'Inst.', r'\bMaterials\b': 'Mater.',
-        r'\bAdvanced\b': 'Adv.', r'\bAdvances\b': 'Adv.', r'\bQuantum\b': 'Quantum', 
-        r'\bPhotonics\b': 'Photonics', r'\bChemistry\b': 'Chem.', r'\bChemical\b': 'Chem.',
-        r'\bResearch\b': 'Res.', r'\bReports\b': 'Rep.', r'\bElectronics\b': 'Electron.',
-        r'\bBiomedical\b': 'Biomed.', r'\bSpectroscopy\b': 'Spectrosc.',
-        r'\bMeasurement\b': 'Meas.', r'\bInstruments\b': 'Instrum.', r'\bEuropean\b': 'Eur.',
-        r'\bof\b': '', r'\bthe\b': '', r'\band\b': '', r'\b&\b': ''
-    }
-    
-    abbr_name = journal_name
-    for word, replacement in word_replacements.items():
-        abbr_name = re.sub(word, replacement, abbr_name, flags=re.IGNORECASE)
-        
-    return re.sub(r'\s+', ' ', abbr_name).strip()
-    
 def format_authors_lc(author_field):
     r"""
     Converts BibTeX authors to Vancouver/NLM style (Lastname Initials).
@@ -343,24 +342,19 @@ def format_authors_lc(author_field):
             
     return ", ".join(formatted_authors) + "."
 
-def bibtex_to_reference_lc(bibtex_str):
+def format_reference_lc(row):
     """
-    Convert BibTeX entry to Liquid Crystals (Vancouver/NLM) style reference.
+    Liquid Crystals (Vancouver/NLM) style reference from the BibTeX columns of a
+    database row (a Series or a dict).
     """
-    if not isinstance(bibtex_str, str):
-        return ""
-
-    # --- NEW: Removed the nested dummy functions. 
-    # It now correctly uses the global functions defined above! ---
-
-    authors = parse_bibtex_field(bibtex_str, 'author')
-    title = parse_bibtex_field(bibtex_str, 'title')
-    journal = parse_bibtex_field(bibtex_str, 'journal')
-    year = parse_bibtex_field(bibtex_str, 'year')
-    volume = parse_bibtex_field(bibtex_str, 'volume')
-    number = parse_bibtex_field(bibtex_str, 'number')
-    pages = parse_bibtex_field(bibtex_str, 'pages')
-    doi = parse_doi_from_bibtex(bibtex_str)
+    authors = _reference_field(row, 'Author')
+    title = _reference_field(row, 'Title')
+    journal = _reference_field(row, 'Journal')
+    year = _reference_field(row, 'Year')
+    volume = _reference_field(row, 'Volume')
+    number = _reference_field(row, 'Number')
+    pages = _reference_field(row, 'Pages')
+    doi = _reference_field(row, 'DOI')
 
     parts =[]
 